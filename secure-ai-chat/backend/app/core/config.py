@@ -88,6 +88,9 @@ class Settings(BaseSettings):
     # API設定
     API_V1_STR: str = "/api/v1"
     
+    # WebSocket設定（"msgpack"サブプロトコル要求時にMessagePackで送信）
+    WEBSOCKET_BINARY_PROTOCOL: bool = False
+    
     # プロジェクトルート
     PROJECT_ROOT: Path = Path(__file__).parent.parent.parent
     
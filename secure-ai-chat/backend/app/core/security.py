@@ -7,6 +7,7 @@ from typing import Any, Optional, Dict
 import secrets
 import hashlib
 import hmac
+import time
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -17,8 +18,39 @@ import base64
 
 from app.core.config import settings
 
-# パスワードハッシュ化設定
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# パスワードハッシュ化設定（bcryptのコストは起動時に calibrate_password_hashing でハードウェアに合わせて決定）
+BCRYPT_MIN_ROUNDS = 12  # 従来の固定コスト。遅いホストでもこれより下げない
+BCRYPT_MAX_ROUNDS = 14
+BCRYPT_TARGET_MS = 250
+BCRYPT_CALIBRATION_RUNS = 3
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_MIN_ROUNDS)
+
+def _calibrate_bcrypt_rounds() -> int:
+    """1回のハッシュが BCRYPT_TARGET_MS 以内に収まる最大のbcryptコストを推定"""
+    probe = CryptContext(schemes=["bcrypt"], bcrypt__rounds=BCRYPT_MIN_ROUNDS)
+    # 初回のハッシュはバックエンドの読み込みとセルフテストを含むため計測しない
+    probe.hash("calibration")
+    
+    # 他の処理による揺らぎを避けるため、複数回のうち最速の値を使う
+    elapsed_ms = float("inf")
+    for _ in range(BCRYPT_CALIBRATION_RUNS):
+        start = time.perf_counter()
+        probe.hash("calibration")
+        elapsed_ms = min(elapsed_ms, (time.perf_counter() - start) * 1000)
+    
+    # コストを1上げるごとにハッシュ時間は2倍になる
+    rounds = BCRYPT_MIN_ROUNDS
+    while rounds < BCRYPT_MAX_ROUNDS and elapsed_ms * 2 <= BCRYPT_TARGET_MS:
+        elapsed_ms *= 2
+        rounds += 1
+    return rounds
+
+def calibrate_password_hashing() -> int:
+    """bcryptのコストをハードウェアに合わせて設定（起動時に1回呼び出す。約1秒かかる同期処理）"""
+    rounds = _calibrate_bcrypt_rounds()
+    pwd_context.update(bcrypt__rounds=rounds)
+    return rounds
 
 class SecurityManager:
     """セキュリティ管理クラス"""
@@ -149,21 +181,12 @@ def hash_data(data: str, salt: Optional[str] = None) -> str:
 
 def verify_signature(data: str, signature: str, key: str) -> bool:
     """HMAC署名検証"""
-    expected_signature = hmac.new(
-        key.encode(),
-        data.encode(),
-        hashlib.sha256
-    ).hexdigest()
-    
-    return hmac.compare_digest(signature, expected_signature)
+    return hmac.compare_digest(signature, create_signature(data, key))
 
 def create_signature(data: str, key: str) -> str:
     """HMAC署名作成"""
-    return hmac.new(
-        key.encode(),
-        data.encode(),
-        hashlib.sha256
-    ).hexdigest()
+    # hmac.digest はOpenSSLのワンショットHMACを直接呼び出す（HMACオブジェクトを生成しない）
+    return hmac.digest(key.encode(), data.encode(), "sha256").hex()
 
 class RateLimiter:
     """レート制限クラス"""
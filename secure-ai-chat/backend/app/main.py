@@ -15,8 +15,10 @@ import logging
 
 from app.core.config import settings, validate_settings
 from app.core.database import create_tables
+from app.core.security import calibrate_password_hashing
 from app.api.endpoints import templates  # テンプレート機能を有効化
 from app.api.endpoints import ai  # AI機能を有効化
+from app.websocket import start_cleanup_task, stop_cleanup_task
 
 # ログ設定
 logging.basicConfig(
@@ -41,6 +43,10 @@ async def lifespan(app: FastAPI):
         await create_tables()
         logger.info("✅ データベーステーブルの初期化完了")
         
+        # bcryptのコストをハードウェアに合わせて決定（同期処理のためイベントループ外で実行）
+        bcrypt_rounds = await asyncio.to_thread(calibrate_password_hashing)
+        logger.info(f"✅ パスワードハッシュのコスト設定完了 (bcrypt rounds: {bcrypt_rounds})")
+        
         # AI サービス初期化テスト
         try:
             from app.services.ai_service import ai_service
@@ -49,6 +55,10 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"⚠️ AI サービス初期化エラー (続行): {e}")
         
+        # WebSocket非アクティブ接続の定期クリーンアップ開始
+        cleanup_task = await start_cleanup_task()
+        logger.info("✅ WebSocketクリーンアップタスク開始")
+        
         # その他の初期化処理
         logger.info("✅ アプリケーション初期化完了")
         
@@ -60,6 +70,7 @@ async def lifespan(app: FastAPI):
     
     # 終了時処理
     logger.info("🔄 セキュアAIチャットサービスを終了中...")
+    await stop_cleanup_task(cleanup_task)
 
 # FastAPIアプリケーション作成
 app = FastAPI(
@@ -249,6 +260,9 @@ if __name__ == "__main__":
         port=8000,
         reload=not settings.is_production,
         log_level=settings.LOG_LEVEL.lower(),
+        loop="uvloop",  # libuvベースのイベントループ（WebSocket処理の高速化）
+        http="httptools",
+        ws="websockets",
         ssl_keyfile=settings.SSL_KEY_PATH if settings.is_production else None,
         ssl_certfile=settings.SSL_CERT_PATH if settings.is_production else None,
     )
\ No newline at end of file
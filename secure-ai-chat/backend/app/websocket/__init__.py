@@ -2,6 +2,6 @@
 WebSocket統合モジュール
 """
 
-from .manager import manager
+from .manager import manager, start_cleanup_task, stop_cleanup_task
 
-__all__ = ["manager"]
\ No newline at end of file
+__all__ = ["manager", "start_cleanup_task", "stop_cleanup_task"]
\ No newline at end of file
@@ -2,30 +2,149 @@
 セキュアAIチャット - WebSocket接続マネージャー
 """
 
-import json
 import asyncio
-from typing import Dict, List, Set
+import heapq
+import itertools
+from dataclasses import dataclass, field
+from typing import Collection, Dict, List, Optional, Set, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
 import logging
 from datetime import datetime
+import msgpack
+import orjson
+
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# MessagePack（バイナリ）プロトコルのサブプロトコル名
+BINARY_SUBPROTOCOL = "msgpack"
+
+def _default(obj):
+    """JSON/MessagePack非対応型のフォールバック変換"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+class EncodedMessage:
+    """一度だけエンコードされるメッセージ
+
+    送信先の接続が必要とする形式（JSONテキスト / MessagePackバイナリ）を
+    初回アクセス時にのみ生成し、ファンアウト全体で共有する。
+    """
+    __slots__ = ("message", "_text", "_binary")
+    
+    def __init__(self, message: dict):
+        self.message = message
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+    
+    @property
+    def text(self) -> str:
+        """JSONテキスト（orjsonによる高速化）"""
+        if self._text is None:
+            # ブラウザ側がテキストフレームを前提としているため、UTF-8文字列として保持
+            self._text = orjson.dumps(self.message, default=_default).decode()
+        return self._text
+    
+    @property
+    def binary(self) -> bytes:
+        """MessagePackバイナリ"""
+        if self._binary is None:
+            self._binary = msgpack.packb(self.message, use_bin_type=True, default=_default)
+        return self._binary
+
+def _encode(message: dict) -> EncodedMessage:
+    """WebSocketペイロードをエンコード"""
+    return EncodedMessage(message)
+
+@dataclass(slots=True)
+class ConnMeta:
+    """WebSocket接続メタデータ（時刻はイベントループの単調時刻）"""
+    user_id: int
+    chat_id: Optional[int]
+    connected_at: float
+    last_activity: float
+    send_queue: asyncio.Queue
+    writer_task: asyncio.Task
+    binary: bool = field(default=False)
+    overflowed: bool = field(default=False)
+
 class ConnectionManager:
     """WebSocket接続管理クラス"""
     
-    def __init__(self):
+    # AIストリームの集約送信設定
+    STREAM_FLUSH_INTERVAL = 0.015  # 秒
+    STREAM_MAX_BATCH_SIZE = 64
+    # タイムスタンプ文字列のキャッシュ有効期間（秒）
+    TIMESTAMP_CACHE_TTL = 0.05
+    # 接続ごとの送信キュー上限（超過した低速クライアントは切断）
+    SEND_QUEUE_MAXSIZE = 256
+    # ファンアウト時にイベントループへ制御を返す間隔（接続数）
+    FAN_OUT_BATCH_SIZE = 64
+    # タイピングインジケーターの間引き設定（秒）
+    TYPING_DEBOUNCE_INTERVAL = 0.2
+    TYPING_IDLE_TIMEOUT = 3.0
+    
+    def __init__(self, binary_protocol: bool = False):
+        # MessagePackサブプロトコルを要求したクライアントにバイナリで送信するか
+        self.binary_protocol = binary_protocol
         # アクティブな接続: user_id -> Set[WebSocket]
         self.active_connections: Dict[int, Set[WebSocket]] = {}
-        # チャットルーム接続: chat_id -> Set[user_id]
-        self.chat_rooms: Dict[int, Set[int]] = {}
+        # チャットルーム接続: chat_id -> {user_id: 接続数}
+        self.chat_rooms: Dict[int, Dict[int, int]] = {}
+        # チャットルーム内の接続: chat_id -> Set[WebSocket]（ファンアウト用インデックス）
+        self.chat_sockets: Dict[int, Set[WebSocket]] = {}
         # 接続メタデータ
-        self.connection_metadata: Dict[WebSocket, Dict] = {}
+        self.connection_metadata: Dict[WebSocket, ConnMeta] = {}
+        # AIストリーム送信バッファ: chat_id -> 未送信チャンク
+        self._stream_buffers: Dict[int, list] = {}
+        self._stream_flush_tasks: Dict[int, asyncio.Task] = {}
+        # ISOタイムスタンプキャッシュ: (loop.time(), ISO文字列)
+        self._now_iso_cache: Tuple[float, str] = (float("-inf"), "")
+        # タイピング状態: (chat_id, user_id) -> (最終送信状態, 送信時刻)
+        self._typing_state: Dict[Tuple[int, int], Tuple[bool, float]] = {}
+        self._typing_timeouts: Dict[Tuple[int, int], asyncio.TimerHandle] = {}
+        # 非アクティブ判定用ヒープ: (last_activity, 連番, WebSocket)
+        self._activity_heap: List[Tuple[float, int, WebSocket]] = []
+        self._activity_seq = itertools.count()
+        # 実行中のバックグラウンドタスク（ループは弱参照しか持たないため完了まで保持）
+        self._background_tasks: Set[asyncio.Task] = set()
+    
+    def _spawn_background(self, coro) -> asyncio.Task:
+        """完了まで参照を保持したままバックグラウンドタスクを起動"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+    
+    @staticmethod
+    def _loop_time() -> float:
+        """イベントループの単調時刻を取得"""
+        return asyncio.get_running_loop().time()
+    
+    def _now_iso(self) -> str:
+        """キャッシュ済みのISOタイムスタンプを取得"""
+        now = self._loop_time()
+        cached_at, cached_iso = self._now_iso_cache
+        if now - cached_at > self.TIMESTAMP_CACHE_TTL:
+            cached_iso = datetime.utcnow().isoformat()
+            self._now_iso_cache = (now, cached_iso)
+        return cached_iso
+    
+    def _envelope(self, message_type: str, chat_id: Optional[int], **fields) -> dict:
+        """ブロードキャスト共通のメッセージエンベロープを生成"""
+        return {"type": message_type, "chat_id": chat_id, **fields, "timestamp": self._now_iso()}
     
     async def connect(self, websocket: WebSocket, user_id: int, chat_id: int = None):
         """WebSocket接続を確立"""
         try:
-            await websocket.accept()
+            # クライアントがMessagePackを要求した場合のみバイナリプロトコルを使用
+            binary = (
+                self.binary_protocol
+                and BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", ())
+            )
+            await websocket.accept(subprotocol=BINARY_SUBPROTOCOL if binary else None)
             
             # ユーザー接続を記録
             if user_id not in self.active_connections:
@@ -34,139 +153,291 @@ class ConnectionManager:
             
             # チャットルーム参加
             if chat_id:
-                if chat_id not in self.chat_rooms:
-                    self.chat_rooms[chat_id] = set()
-                self.chat_rooms[chat_id].add(user_id)
+                room = self.chat_rooms.setdefault(chat_id, {})
+                room[user_id] = room.get(user_id, 0) + 1
+                self.chat_sockets.setdefault(chat_id, set()).add(websocket)
+            
+            # 送信キューと専用ライタータスク
+            send_queue: asyncio.Queue = asyncio.Queue(maxsize=self.SEND_QUEUE_MAXSIZE)
+            writer_task = asyncio.create_task(self._writer_loop(websocket, send_queue))
             
             # 接続メタデータ保存
-            self.connection_metadata[websocket] = {
-                "user_id": user_id,
-                "chat_id": chat_id,
-                "connected_at": datetime.utcnow(),
-                "last_activity": datetime.utcnow()
-            }
+            now = self._loop_time()
+            self.connection_metadata[websocket] = ConnMeta(
+                user_id=user_id,
+                chat_id=chat_id,
+                connected_at=now,
+                last_activity=now,
+                send_queue=send_queue,
+                writer_task=writer_task,
+                binary=binary
+            )
+            heapq.heappush(self._activity_heap, (now, next(self._activity_seq), websocket))
             
-            logger.info(f"WebSocket接続確立: user_id={user_id}, chat_id={chat_id}")
+            logger.info("WebSocket接続確立: user_id=%s, chat_id=%s", user_id, chat_id)
             
             # 接続完了メッセージ送信
             await self.send_personal_message({
                 "type": "connection_established",
                 "user_id": user_id,
                 "chat_id": chat_id,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": self._now_iso()
             }, websocket)
             
         except Exception as e:
-            logger.error(f"WebSocket接続エラー: {e}")
+            logger.error("WebSocket接続エラー: %s", e)
             raise
     
     def disconnect(self, websocket: WebSocket):
         """WebSocket接続を切断"""
         try:
-            metadata = self.connection_metadata.get(websocket, {})
-            user_id = metadata.get("user_id")
-            chat_id = metadata.get("chat_id")
+            metadata = self.connection_metadata.pop(websocket, None)
+            if metadata is None:
+                return
+            user_id = metadata.user_id
+            chat_id = metadata.chat_id
             
             # ユーザー接続から削除
-            if user_id and user_id in self.active_connections:
+            if user_id in self.active_connections:
                 self.active_connections[user_id].discard(websocket)
                 if not self.active_connections[user_id]:
                     del self.active_connections[user_id]
             
             # チャットルームから退出
-            if chat_id and chat_id in self.chat_rooms:
-                self.chat_rooms[chat_id].discard(user_id)
-                if not self.chat_rooms[chat_id]:
+            # （同一ユーザーの他の接続が残っている場合は参加を維持）
+            room = self.chat_rooms.get(chat_id) if chat_id else None
+            if room and user_id in room:
+                room[user_id] -= 1
+                if room[user_id] <= 0:
+                    del room[user_id]
+                if not room:
                     del self.chat_rooms[chat_id]
             
-            # メタデータ削除
-            if websocket in self.connection_metadata:
-                del self.connection_metadata[websocket]
+            if chat_id and chat_id in self.chat_sockets:
+                self.chat_sockets[chat_id].discard(websocket)
+                if not self.chat_sockets[chat_id]:
+                    del self.chat_sockets[chat_id]
+            
+            # ライタータスク停止と未送信キューの破棄
+            if metadata.writer_task is not asyncio.current_task():
+                metadata.writer_task.cancel()
+            while not metadata.send_queue.empty():
+                metadata.send_queue.get_nowait()
             
-            logger.info(f"WebSocket接続切断: user_id={user_id}, chat_id={chat_id}")
+            logger.info("WebSocket接続切断: user_id=%s, chat_id=%s", user_id, chat_id)
             
         except Exception as e:
-            logger.error(f"WebSocket切断処理エラー: {e}")
+            logger.error("WebSocket切断処理エラー: %s", e)
     
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """特定の接続にメッセージ送信"""
+        await self._send_encoded(websocket, _encode(message))
+    
+    async def _send_encoded(self, websocket: WebSocket, payload: EncodedMessage):
+        """エンコード済みペイロードを特定の接続に送信"""
+        # 管理下の接続は送信キュー経由
+        if websocket in self.connection_metadata:
+            self._enqueue(websocket, payload)
+            return
+        
         try:
-            await websocket.send_text(json.dumps(message, ensure_ascii=False))
-            
-            # アクティビティ更新
-            if websocket in self.connection_metadata:
-                self.connection_metadata[websocket]["last_activity"] = datetime.utcnow()
+            await websocket.send_text(payload.text)
+        except WebSocketDisconnect:
+            # 接続が既に切れている場合
+            self.disconnect(websocket)
+        except Exception as e:
+            logger.error("メッセージ送信エラー: %s", e)
+    
+    def _enqueue(self, websocket: WebSocket, payload: EncodedMessage) -> bool:
+        """シリアライズ済みペイロードを送信キューに追加"""
+        metadata = self.connection_metadata.get(websocket)
+        if metadata is None:
+            return False
+        
+        try:
+            metadata.send_queue.put_nowait(payload.binary if metadata.binary else payload.text)
+            return True
+        except asyncio.QueueFull:
+            # 低速クライアント: メモリ保護のため切断
+            # （ファンアウト中の接続集合を変更しないよう切断は後続タスクで行う）
+            if not metadata.overflowed:
+                metadata.overflowed = True
+                logger.warning("送信キュー溢れのため切断: user_id=%s", metadata.user_id)
+                self._spawn_background(self._drop_slow_consumer(websocket))
+            return False
+    
+    async def _drop_slow_consumer(self, websocket: WebSocket):
+        """送信キューが溢れた接続を切断"""
+        self.disconnect(websocket)
+        await self._close_quietly(websocket, 1008, "Send queue overflow")
+    
+    async def _writer_loop(self, websocket: WebSocket, send_queue: asyncio.Queue):
+        """接続ごとの送信ループ（送信キューから順次送信）"""
+        try:
+            while True:
+                payload = await send_queue.get()
+                if isinstance(payload, bytes):
+                    await websocket.send_bytes(payload)
+                else:
+                    await websocket.send_text(payload)
                 
+                # アクティビティ更新
+                metadata = self.connection_metadata.get(websocket)
+                if metadata is not None:
+                    metadata.last_activity = self._loop_time()
+        except asyncio.CancelledError:
+            raise
         except WebSocketDisconnect:
             # 接続が既に切れている場合
             self.disconnect(websocket)
         except Exception as e:
-            logger.error(f"メッセージ送信エラー: {e}")
+            logger.error("メッセージ送信エラー: %s", e)
+            self.disconnect(websocket)
+    
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket, code: int, reason: str):
+        """WebSocketを例外を無視してクローズ"""
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+    
+    async def _fan_out(self, targets: Collection[WebSocket], payload: EncodedMessage):
+        """複数接続の送信キューへペイロードを配布"""
+        batch_size = self.FAN_OUT_BATCH_SIZE
+        if len(targets) <= batch_size:
+            for websocket in targets:
+                self._enqueue(websocket, payload)
+            return
+        
+        # 大規模ルームはバッチごとにイベントループへ制御を返す
+        # （待機中に接続集合が変化しうるためスナップショットを走査）
+        snapshot = tuple(targets)
+        for start in range(0, len(snapshot), batch_size):
+            for websocket in snapshot[start:start + batch_size]:
+                self._enqueue(websocket, payload)
+            await asyncio.sleep(0)
     
     async def send_message_to_user(self, user_id: int, message: dict):
         """特定ユーザーのすべての接続にメッセージ送信"""
-        if user_id in self.active_connections:
-            disconnected_connections = []
-            
-            for connection in self.active_connections[user_id].copy():
-                try:
-                    await self.send_personal_message(message, connection)
-                except:
-                    disconnected_connections.append(connection)
-            
-            # 切断された接続を削除
-            for connection in disconnected_connections:
-                self.disconnect(connection)
+        if user_id not in self.active_connections:
+            return
+        
+        await self.send_encoded_to_user(user_id, _encode(message))
+    
+    async def send_encoded_to_user(self, user_id: int, payload: EncodedMessage):
+        """特定ユーザーのすべての接続にエンコード済みペイロードを送信"""
+        connections = self.active_connections.get(user_id)
+        if not connections:
+            return
+        
+        # キュー投入は接続集合を変更しないため、スナップショットを取らずに走査
+        await self._fan_out(connections, payload)
     
     async def broadcast_to_chat(self, chat_id: int, message: dict, exclude_user_id: int = None):
         """チャットルーム内の全ユーザーにブロードキャスト"""
-        if chat_id not in self.chat_rooms:
+        sockets = self.chat_sockets.get(chat_id)
+        if not sockets:
             return
         
-        for user_id in self.chat_rooms[chat_id]:
-            if exclude_user_id and user_id == exclude_user_id:
-                continue
-            
-            await self.send_message_to_user(user_id, message)
+        # ペイロードは一度だけシリアライズ
+        payload = _encode(message)
+        if exclude_user_id is not None and exclude_user_id in self.active_connections:
+            # 除外ユーザーの接続を集合差でまとめて除く
+            targets = sockets - self.active_connections[exclude_user_id]
+        else:
+            targets = sockets
+        
+        await self._fan_out(targets, payload)
     
     async def broadcast_typing_indicator(self, chat_id: int, user_id: int, is_typing: bool):
-        """タイピングインジケーターをブロードキャスト"""
-        message = {
-            "type": "typing_indicator",
-            "chat_id": chat_id,
-            "user_id": user_id,
-            "is_typing": is_typing,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        """タイピングインジケーターをブロードキャスト（同一状態の連続送信を間引き）"""
+        key = (chat_id, user_id)
+        now = self._loop_time()
+        
+        if is_typing:
+            self._schedule_typing_timeout(key)
+        else:
+            timer = self._typing_timeouts.pop(key, None)
+            if timer:
+                timer.cancel()
+        
+        last_state = self._typing_state.get(key)
+        if (last_state is not None and last_state[0] == is_typing
+                and now - last_state[1] < self.TYPING_DEBOUNCE_INTERVAL):
+            return
+        
+        if is_typing:
+            self._typing_state[key] = (is_typing, now)
+        else:
+            self._typing_state.pop(key, None)
+        
+        message = self._envelope("typing_indicator", chat_id, user_id=user_id, is_typing=is_typing)
         
         await self.broadcast_to_chat(chat_id, message, exclude_user_id=user_id)
     
+    def _schedule_typing_timeout(self, key: Tuple[int, int]):
+        """一定時間更新がなければ is_typing=False を送信するタイマーを設定"""
+        timer = self._typing_timeouts.pop(key, None)
+        if timer:
+            timer.cancel()
+        
+        chat_id, user_id = key
+        loop = asyncio.get_running_loop()
+        self._typing_timeouts[key] = loop.call_later(
+            self.TYPING_IDLE_TIMEOUT,
+            lambda: self._spawn_background(
+                self.broadcast_typing_indicator(chat_id, user_id, False)
+            )
+        )
+    
     async def broadcast_new_message(self, chat_id: int, message_data: dict):
         """新しいメッセージをチャットルームにブロードキャスト"""
-        message = {
-            "type": "new_message",
-            "chat_id": chat_id,
-            "message": message_data,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        message = self._envelope("new_message", chat_id, message=message_data)
         
         await self.broadcast_to_chat(chat_id, message)
     
     async def broadcast_ai_stream(self, chat_id: int, stream_data: dict):
-        """AIストリーミングレスポンスをブロードキャスト"""
-        message = {
-            "type": "ai_stream",
-            "chat_id": chat_id,
-            "stream_data": stream_data,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        """AIストリーミングレスポンスをブロードキャスト（短時間のチャンクを集約）"""
+        buffer = self._stream_buffers.setdefault(chat_id, [])
+        buffer.append(stream_data)
         
-        await self.broadcast_to_chat(chat_id, message)
+        # バッファ上限に達したら即時送信
+        if len(buffer) >= self.STREAM_MAX_BATCH_SIZE:
+            task = self._stream_flush_tasks.pop(chat_id, None)
+            if task:
+                task.cancel()
+            await self._flush_stream(chat_id)
+            return
+        
+        if chat_id not in self._stream_flush_tasks:
+            self._stream_flush_tasks[chat_id] = asyncio.create_task(
+                self._flush_stream_later(chat_id)
+            )
+    
+    async def _flush_stream_later(self, chat_id: int):
+        """一定時間待機後にストリームバッファを送信"""
+        await asyncio.sleep(self.STREAM_FLUSH_INTERVAL)
+        self._stream_flush_tasks.pop(chat_id, None)
+        await self._flush_stream(chat_id)
+    
+    async def _flush_stream(self, chat_id: int):
+        """集約したストリームチャンクを1フレームで送信"""
+        chunks = self._stream_buffers.pop(chat_id, None)
+        if not chunks:
+            return
+        
+        message = self._envelope("ai_stream_batch", chat_id, chunks=chunks)
+        
+        try:
+            await self.broadcast_to_chat(chat_id, message)
+        except Exception as e:
+            logger.error("AIストリーム送信エラー: %s", e)
     
     def get_active_users(self, chat_id: int = None) -> List[int]:
         """アクティブユーザー一覧を取得"""
         if chat_id:
-            return list(self.chat_rooms.get(chat_id, set()))
+            return list(self.chat_rooms.get(chat_id, {}).keys())
         else:
             return list(self.active_connections.keys())
     
@@ -180,13 +451,22 @@ class ConnectionManager:
     
     async def cleanup_inactive_connections(self, timeout_minutes: int = 30):
         """非アクティブな接続をクリーンアップ"""
-        current_time = datetime.utcnow()
+        cutoff = self._loop_time() - timeout_minutes * 60
         inactive_connections = []
         
-        for websocket, metadata in self.connection_metadata.items():
-            last_activity = metadata.get("last_activity", current_time)
-            if (current_time - last_activity).total_seconds() > (timeout_minutes * 60):
+        # 期限切れ候補のみを取り出す（エントリは遅延更新）
+        heap = self._activity_heap
+        while heap and heap[0][0] < cutoff:
+            _, _, websocket = heapq.heappop(heap)
+            metadata = self.connection_metadata.get(websocket)
+            if metadata is None:
+                # 切断済み接続の古いエントリ
+                continue
+            if metadata.last_activity < cutoff:
                 inactive_connections.append(websocket)
+            else:
+                # 活動があった接続は最新時刻で再登録
+                heapq.heappush(heap, (metadata.last_activity, next(self._activity_seq), websocket))
         
         for websocket in inactive_connections:
             try:
@@ -196,10 +476,10 @@ class ConnectionManager:
             self.disconnect(websocket)
         
         if inactive_connections:
-            logger.info(f"非アクティブ接続をクリーンアップ: {len(inactive_connections)}個")
+            logger.info("非アクティブ接続をクリーンアップ: %s個", len(inactive_connections))
 
 # グローバル接続マネージャー
-manager = ConnectionManager()
+manager = ConnectionManager(binary_protocol=settings.WEBSOCKET_BINARY_PROTOCOL)
 
 # 定期的なクリーンアップタスク
 async def periodic_cleanup():
@@ -208,8 +488,16 @@ async def periodic_cleanup():
         try:
             await asyncio.sleep(300)  # 5分間隔
             await manager.cleanup_inactive_connections()
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"定期クリーンアップエラー: {e}")
+            logger.error("定期クリーンアップエラー: %s", e)
+
+async def start_cleanup_task() -> asyncio.Task:
+    """定期クリーンアップタスクを開始（アプリ起動時に呼び出す）"""
+    return asyncio.create_task(periodic_cleanup())
 
-# バックグラウンドタスクとして実行
-asyncio.create_task(periodic_cleanup())
\ No newline at end of file
+async def stop_cleanup_task(task: asyncio.Task):
+    """定期クリーンアップタスクを停止（アプリ終了時に呼び出す）"""
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
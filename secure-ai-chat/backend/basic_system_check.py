@@ -3,8 +3,10 @@
 基本的なシステム構成チェック
 """
 import asyncio
+import importlib
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # プロジェクトルートをPythonパスに追加
@@ -28,14 +30,21 @@ async def test_imports():
     passed = 0
     failed = 0
     
-    for module_name, description in tests:
-        try:
-            __import__(module_name)
+    # モジュール解決・バイトコード読み込みをスレッドプールで並行実行
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = await asyncio.gather(
+            *[loop.run_in_executor(pool, importlib.import_module, module_name) for module_name, _ in tests],
+            return_exceptions=True
+        )
+    
+    for (module_name, description), result in zip(tests, results):
+        if isinstance(result, BaseException):
+            print(f"❌ {description}: {str(result)}")
+            failed += 1
+        else:
             print(f"✅ {description}: OK")
             passed += 1
-        except Exception as e:
-            print(f"❌ {description}: {str(e)}")
-            failed += 1
     
     print(f"\nインポートテスト結果: {passed} passed, {failed} failed")
     return failed == 0
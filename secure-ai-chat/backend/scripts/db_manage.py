@@ -4,18 +4,23 @@
 """
 
 import asyncio
+import functools
 import sys
 import os
 from pathlib import Path
 import logging
+from datetime import datetime, timezone
 
 # パスを追加してアプリケーションモジュールをインポート可能に
 backend_dir = Path(__file__).parent.parent
 sys.path.append(str(backend_dir))
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import asyncpg
 from alembic.config import Config
 from alembic import command as alembic_command
@@ -28,104 +33,144 @@ from app.core.security import get_password_hash
 
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=1)
+def _alembic_cfg() -> Config:
+    """Alembic設定を一度だけ読み込んで共有"""
+    return Config(str(backend_dir / "alembic.ini"))
+
 class DatabaseManager:
     """データベース管理クラス"""
     
+    # シードデータ投入でCOPYプロトコルに切り替える件数
+    COPY_THRESHOLD = 100
+    
     def __init__(self):
         self.sync_db_url = settings.DATABASE_URL
         self.async_db_url = settings.database_url_async
-        self.alembic_cfg = Config(str(backend_dir / "alembic.ini"))
+        self.alembic_cfg = _alembic_cfg()
+        # SKIP_ALEMBIC 設定時はマイグレーションを実行せず、モデル定義からのテーブル作成のみ行う
+        self.skip_alembic = bool(os.getenv("SKIP_ALEMBIC"))
+        # 全メソッドで共有する非同期エンジン（接続プールを再利用）
+        self._engine = create_async_engine(
+            self.async_db_url,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=5,
+            max_overflow=10,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            # ロック待ち等でのハングを防ぐためのタイムアウト
+            connect_args={
+                "command_timeout": 10,
+                "server_settings": {"statement_timeout": "10000"}
+            }
+        )
+    
+    async def close(self):
+        """共有エンジンを破棄（プロセス終了時に一度だけ呼び出す）"""
+        await self._engine.dispose()
     
     async def create_database(self):
         """データベースを作成（存在しない場合）"""
-        print("🔄 データベースの作成チェック中...")
+        logger.info("🔄 データベースの作成チェック中...")
         
         # PostgreSQLの場合、管理者データベースに接続してDBを作成
         if self.sync_db_url.startswith('postgresql'):
-            # データベース名を抽出
-            db_name = self.sync_db_url.split('/')[-1]
-            admin_url = self.sync_db_url.rsplit('/', 1)[0] + '/postgres'
+            url = make_url(self.sync_db_url)
+            db_name = url.database
             
             try:
-                # 管理者データベースに接続
-                admin_engine = create_engine(admin_url)
+                # 管理者データベースに asyncpg で直接接続
+                conn = await asyncpg.connect(
+                    host=url.host,
+                    port=url.port,
+                    user=url.username,
+                    password=url.password,
+                    database="postgres"
+                )
                 
-                with admin_engine.connect() as conn:
+                try:
                     # データベース存在確認
-                    result = conn.execute(
-                        text(f"SELECT 1 FROM pg_database WHERE datname = '{db_name}'")
+                    exists = await conn.fetchval(
+                        "SELECT 1 FROM pg_database WHERE datname = $1", db_name
                     )
                     
-                    if not result.fetchone():
-                        # 自動コミットモードで実行
-                        conn.execute(text("COMMIT"))
-                        conn.execute(text(f"CREATE DATABASE {db_name}"))
-                        print(f"✅ データベース '{db_name}' を作成しました")
+                    if not exists:
+                        # DDLはパラメータ化できないため識別子としてクォート
+                        quoted_name = db_name.replace('"', '""')
+                        await conn.execute(f'CREATE DATABASE "{quoted_name}"')
+                        logger.info(f"✅ データベース '{db_name}' を作成しました")
                     else:
-                        print(f"ℹ️ データベース '{db_name}' は既に存在します")
-                
-                admin_engine.dispose()
+                        logger.info(f"ℹ️ データベース '{db_name}' は既に存在します")
+                finally:
+                    await conn.close()
                 
             except Exception as e:
-                print(f"❌ データベース作成エラー: {e}")
+                logger.error(f"❌ データベース作成エラー: {e}")
                 return False
         
         return True
     
     async def run_migrations(self):
         """マイグレーション実行"""
-        print("🔄 マイグレーションを実行中...")
+        logger.info("🔄 マイグレーションを実行中...")
+        
+        if self.skip_alembic:
+            logger.info("ℹ️ SKIP_ALEMBIC が設定されているためマイグレーションをスキップします")
+            return True
         
         try:
-            # Alembicでマイグレーション実行
-            alembic_command.upgrade(self.alembic_cfg, "head")
-            print("✅ マイグレーション完了")
+            # Alembicでマイグレーション実行（同期処理のためイベントループ外で実行）
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, alembic_command.upgrade, self.alembic_cfg, "head")
+            # env.py の fileConfig が既存ロガーを無効化するため再有効化
+            logger.disabled = False
+            logger.info("✅ マイグレーション完了")
             return True
         except Exception as e:
-            print(f"❌ マイグレーションエラー: {e}")
+            logger.error(f"❌ マイグレーションエラー: {e}")
             return False
     
     async def create_initial_data(self):
         """初期データ作成"""
-        print("🔄 初期データを作成中...")
-        
-        async_engine = create_async_engine(self.async_db_url)
+        logger.info("🔄 初期データを作成中...")
         
         try:
-            async with async_engine.begin() as conn:
+            # マイグレーションは users / template_categories 等を作成しないため、
+            # 不足しているテーブルをモデル定義から作成（既存テーブルはそのまま）
+            async with self._engine.begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
             
             # セッション作成
-            async_session = AsyncSession(async_engine)
+            async_session = AsyncSession(self._engine)
             
             try:
-                # 管理者ユーザーを作成
-                admin_user = User(
-                    username="admin",
-                    email="admin@company.com",
-                    password_hash=get_password_hash("admin123"),
-                    full_name="System Administrator",
-                    department="IT",
-                    position="Administrator",
-                    role=UserRole.ADMIN,
-                    status=UserStatus.ACTIVE,
-                    is_active=True,
-                    email_verified=True,
-                    login_attempts=0,
-                    two_fa_enabled=False
-                )
-                
                 # 既存チェック
                 existing_admin = await async_session.execute(
-                    text("SELECT id FROM users WHERE username = 'admin' OR email = 'admin@company.com'")
+                    text("SELECT id FROM users WHERE username = :username OR email = :email"),
+                    {"username": "admin", "email": "admin@company.com"}
                 )
                 
                 if not existing_admin.fetchone():
+                    # 管理者ユーザーを作成（パスワードハッシュは作成時のみ計算）
+                    admin_user = User(
+                        username="admin",
+                        email="admin@company.com",
+                        password_hash=get_password_hash("admin123"),
+                        full_name="System Administrator",
+                        department="IT",
+                        position="Administrator",
+                        role=UserRole.ADMIN,
+                        status=UserStatus.ACTIVE,
+                        is_active=True,
+                        email_verified=True,
+                        login_attempts=0,
+                        two_fa_enabled=False
+                    )
                     async_session.add(admin_user)
                     await async_session.commit()
-                    print("✅ 管理者ユーザー作成完了 (username: admin, password: admin123)")
+                    logger.info("✅ 管理者ユーザー作成完了 (username: admin, password: admin123)")
                 else:
-                    print("ℹ️ 管理者ユーザーは既に存在します")
+                    logger.info("ℹ️ 管理者ユーザーは既に存在します")
                 
                 # デフォルトテンプレートカテゴリ作成
                 default_categories = [
@@ -159,158 +204,212 @@ class DatabaseManager:
                     }
                 ]
                 
-                for category_data in default_categories:
-                    existing_category = await async_session.execute(
-                        text(f"SELECT id FROM template_categories WHERE name = '{category_data['name']}'")
-                    )
-                    
-                    if not existing_category.fetchone():
-                        category = TemplateCategory(**category_data, is_active=True)
-                        async_session.add(category)
+                # 一括INSERT（既存カテゴリは name の一意制約でスキップ）
+                rows = [{**category_data, "is_active": True} for category_data in default_categories]
+                inserted = await self._insert_categories(async_session, rows)
                 
                 await async_session.commit()
-                print("✅ デフォルトカテゴリ作成完了")
+                logger.info(f"✅ デフォルトカテゴリ作成完了: {inserted}/{len(rows)}件を追加")
                 
             except Exception as e:
                 await async_session.rollback()
-                print(f"❌ 初期データ作成エラー: {e}")
+                logger.error(f"❌ 初期データ作成エラー: {e}")
                 return False
             finally:
                 await async_session.close()
         
         except Exception as e:
-            print(f"❌ データベース接続エラー: {e}")
+            logger.error(f"❌ データベース接続エラー: {e}")
             return False
-        finally:
-            await async_engine.dispose()
         
         return True
     
+    async def _insert_categories(self, async_session: AsyncSession, rows: list) -> int:
+        """テンプレートカテゴリを一括投入し、追加件数を返す"""
+        table = TemplateCategory.__table__
+        
+        if len(rows) <= self.COPY_THRESHOLD:
+            stmt = pg_insert(table).values(rows).on_conflict_do_nothing(
+                index_elements=["name"]
+            ).returning(table.c.id)
+            result = await async_session.execute(stmt)
+            return len(result.fetchall())
+        
+        # 大量データは asyncpg の COPY で一時テーブルへ投入し、1文でマージ
+        now = datetime.now(timezone.utc)
+        columns = ["name", "description", "icon", "color", "sort_order", "is_active", "created_at", "updated_at"]
+        records = [
+            (row["name"], row.get("description"), row.get("icon"), row.get("color"),
+             row.get("sort_order", 0), row.get("is_active", True), now, now)
+            for row in rows
+        ]
+        column_list = ", ".join(columns)
+        
+        sa_conn = await async_session.connection()
+        raw_conn = await sa_conn.get_raw_connection()
+        asyncpg_conn = raw_conn.driver_connection
+        
+        async with asyncpg_conn.transaction():
+            await asyncpg_conn.execute(
+                f"CREATE TEMP TABLE tmp_template_categories AS "
+                f"SELECT {column_list} FROM template_categories WITH NO DATA"
+            )
+            try:
+                await asyncpg_conn.copy_records_to_table(
+                    "tmp_template_categories", records=records, columns=columns
+                )
+                inserted = await asyncpg_conn.fetch(
+                    f"INSERT INTO template_categories ({column_list}) "
+                    f"SELECT {column_list} FROM tmp_template_categories "
+                    f"ON CONFLICT (name) DO NOTHING RETURNING id"
+                )
+            finally:
+                await asyncpg_conn.execute("DROP TABLE IF EXISTS tmp_template_categories")
+        
+        return len(inserted)
+    
     async def reset_database(self):
         """データベースをリセット"""
-        print("🔄 データベースをリセット中...")
+        logger.info("🔄 データベースをリセット中...")
         
-        async_engine = create_async_engine(self.async_db_url)
+        def _reset(sync_conn):
+            # 削除と再作成を1回の同期ブリッジ呼び出しで実行
+            Base.metadata.drop_all(sync_conn)
+            Base.metadata.create_all(sync_conn)
         
         try:
-            async with async_engine.begin() as conn:
-                await conn.run_sync(Base.metadata.drop_all)
-                print("✅ 全テーブル削除完了")
-                
-                await conn.run_sync(Base.metadata.create_all)
-                print("✅ テーブル再作成完了")
+            async with self._engine.begin() as conn:
+                await conn.run_sync(_reset)
+                logger.info("✅ 全テーブル削除・再作成完了")
         
         except Exception as e:
-            print(f"❌ データベースリセットエラー: {e}")
+            logger.error(f"❌ データベースリセットエラー: {e}")
             return False
-        finally:
-            await async_engine.dispose()
         
         return True
     
     async def check_connection(self):
         """データベース接続テスト"""
-        print("🔄 データベース接続をテスト中...")
+        logger.info("🔄 データベース接続をテスト中...")
         
         try:
-            async_engine = create_async_engine(self.async_db_url)
-            
-            async with async_engine.connect() as conn:
+            async with self._engine.connect() as conn:
                 result = await conn.execute(text("SELECT version()"))
                 version = result.scalar()
-                print(f"✅ データベース接続成功: {version}")
+                logger.info(f"✅ データベース接続成功: {version}")
             
-            await async_engine.dispose()
             return True
             
         except Exception as e:
-            print(f"❌ データベース接続エラー: {e}")
+            logger.error(f"❌ データベース接続エラー: {e}")
             return False
     
-    def generate_migration(self, message: str):
+    async def generate_migration(self, message: str):
         """新しいマイグレーションを生成"""
-        print(f"🔄 マイグレーションを生成中: {message}")
+        logger.info(f"🔄 マイグレーションを生成中: {message}")
         
         try:
-            alembic_command.revision(
-                self.alembic_cfg, 
-                message=message, 
-                autogenerate=True
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None,
+                functools.partial(
+                    alembic_command.revision,
+                    self.alembic_cfg,
+                    message=message,
+                    autogenerate=True
+                )
             )
-            print("✅ マイグレーション生成完了")
+            logger.info("✅ マイグレーション生成完了")
             return True
         except Exception as e:
-            print(f"❌ マイグレーション生成エラー: {e}")
+            logger.error(f"❌ マイグレーション生成エラー: {e}")
             return False
 
 async def main():
     """メイン処理"""
     
     if len(sys.argv) < 2:
-        print("使用方法:")
-        print("  python db_manage.py init        # データベース初期化")
-        print("  python db_manage.py migrate     # マイグレーション実行")
-        print("  python db_manage.py reset       # データベースリセット")
-        print("  python db_manage.py check       # 接続テスト")
-        print("  python db_manage.py generate <message>  # マイグレーション生成")
+        logger.info("使用方法:")
+        logger.info("  python db_manage.py init        # データベース初期化")
+        logger.info("  python db_manage.py migrate     # マイグレーション実行")
+        logger.info("  python db_manage.py reset       # データベースリセット")
+        logger.info("  python db_manage.py check       # 接続テスト")
+        logger.info("  python db_manage.py generate <message>  # マイグレーション生成")
         return
     
     command = sys.argv[1]
     db_manager = DatabaseManager()
     
-    if command == "init":
-        print("🚀 データベース初期化を開始...")
+    try:
+        if command == "init":
+            logger.info("🚀 データベース初期化を開始...")
+            
+            success = True
+            success &= await db_manager.create_database()
+            success &= await db_manager.run_migrations()
+            success &= await db_manager.create_initial_data()
+            
+            if success:
+                logger.info("🎉 データベース初期化完了!")
+                logger.info("\n管理者ログイン情報:")
+                logger.info("  ユーザー名: admin")
+                logger.info("  パスワード: admin123")
+                logger.warning("  ⚠️ 本番環境では必ずパスワードを変更してください")
+            else:
+                logger.error("❌ データベース初期化に失敗しました")
+                sys.exit(1)
         
-        success = True
-        success &= await db_manager.create_database()
-        success &= await db_manager.run_migrations()
-        success &= await db_manager.create_initial_data()
+        elif command == "migrate":
+            success = await db_manager.run_migrations()
+            if not success:
+                sys.exit(1)
         
-        if success:
-            print("🎉 データベース初期化完了!")
-            print("\n管理者ログイン情報:")
-            print("  ユーザー名: admin")
-            print("  パスワード: admin123")
-            print("  ⚠️ 本番環境では必ずパスワードを変更してください")
-        else:
-            print("❌ データベース初期化に失敗しました")
-            sys.exit(1)
-    
-    elif command == "migrate":
-        success = await db_manager.run_migrations()
-        if not success:
-            sys.exit(1)
-    
-    elif command == "reset":
-        confirm = input("⚠️ 全データが削除されます。続行しますか? (y/N): ")
-        if confirm.lower() == 'y':
-            success = await db_manager.reset_database()
-            if success:
-                print("✅ データベースリセット完了")
+        elif command == "reset":
+            confirm = input("⚠️ 全データが削除されます。続行しますか? (y/N): ")
+            if confirm.lower() == 'y':
+                success = await db_manager.reset_database()
+                if success:
+                    logger.info("✅ データベースリセット完了")
+                else:
+                    sys.exit(1)
             else:
+                logger.info("キャンセルされました")
+        
+        elif command == "check":
+            success = await db_manager.check_connection()
+            if not success:
                 sys.exit(1)
-        else:
-            print("キャンセルされました")
-    
-    elif command == "check":
-        success = await db_manager.check_connection()
-        if not success:
-            sys.exit(1)
-    
-    elif command == "generate":
-        if len(sys.argv) < 3:
-            print("❌ マイグレーションメッセージが必要です")
-            print("使用例: python db_manage.py generate 'Add user table'")
-            sys.exit(1)
         
-        message = sys.argv[2]
-        success = db_manager.generate_migration(message)
-        if not success:
+        elif command == "generate":
+            if len(sys.argv) < 3:
+                logger.error("❌ マイグレーションメッセージが必要です")
+                logger.info("使用例: python db_manage.py generate 'Add user table'")
+                sys.exit(1)
+            
+            message = sys.argv[2]
+            success = await db_manager.generate_migration(message)
+            if not success:
+                sys.exit(1)
+        
+        else:
+            logger.error(f"❌ 未知のコマンド: {command}")
             sys.exit(1)
-    
-    else:
-        print(f"❌ 未知のコマンド: {command}")
-        sys.exit(1)
+    finally:
+        await db_manager.close()
 
 if __name__ == "__main__":
+    # 標準出力へのログ出力（alembic の fileConfig によるルート設定の影響を受けないよう専用ハンドラー）
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    
+    # uvloop が利用可能ならイベントループとして使用
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     asyncio.run(main())
\ No newline at end of file
@@ -3,6 +3,9 @@
 簡易システムチェックスクリプト
 """
 
+import asyncio
+import contextvars
+import io
 import sys
 import os
 from pathlib import Path
@@ -50,6 +53,14 @@ def check_environment_variables():
         print(f"❌ 環境変数チェックエラー: {e}")
         return False
 
+def _list_dir(path):
+    """ディレクトリ直下のエントリ名の集合（存在しない場合は空集合）"""
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name for entry in entries}
+    except OSError:
+        return set()
+
 def check_file_structure():
     """ファイル構造チェック"""
     critical_paths = [
@@ -61,9 +72,14 @@ def check_file_structure():
         backend_dir / ".env"
     ]
     
+    # 親ディレクトリごとに1回だけ列挙し、存在確認はメモリ上の集合で行う
+    listings = {}
     missing_paths = []
     for path in critical_paths:
-        if not path.exists():
+        parent = path.parent
+        if parent not in listings:
+            listings[parent] = _list_dir(parent)
+        if path.name not in listings[parent]:
             missing_paths.append(str(path))
     
     if missing_paths:
@@ -86,7 +102,7 @@ def check_api_imports():
         print(f"❌ APIモジュールインポートエラー: {e}")
         return False
 
-def check_openai_authentication():
+async def check_openai_authentication():
     """OpenAI認証チェック"""
     try:
         import openai
@@ -97,13 +113,11 @@ def check_openai_authentication():
             return False
         
         # 認証テスト（軽量）
-        client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        async with openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY) as client:
+            # 単一モデルの取得で認証テスト（モデル一覧全体のダウンロードは不要）
+            await client.models.retrieve("gpt-3.5-turbo")
         
-        # モデル一覧取得で認証テスト
-        models = client.models.list()
-        model_count = len([m for m in models.data if 'gpt' in m.id])
-        
-        print(f"✅ OpenAI認証 OK ({model_count}個のGPTモデル利用可能)")
+        print("✅ OpenAI認証 OK (gpt-3.5-turbo 利用可能)")
         print("⚠️ ただし、クォータ制限によりAI機能は制限されている可能性があります")
         return True
         
@@ -111,7 +125,37 @@ def check_openai_authentication():
         print(f"❌ OpenAI認証エラー: {e}")
         return False
 
-def main():
+# 実行中のチェックの出力先（並行実行中のチェックと出力が混ざらないよう個別に溜める）
+_check_output = contextvars.ContextVar("_check_output", default=None)
+
+class _CheckOutputRouter(io.TextIOBase):
+    """print の出力を実行中のチェックのバッファへ振り分ける標準出力"""
+    
+    def __init__(self, stream):
+        self._stream = stream
+    
+    def write(self, text):
+        buffer = _check_output.get()
+        return (buffer if buffer is not None else self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+
+async def _run_check(check_func):
+    """チェックを実行し (結果または例外, 出力) を返す（同期チェックはスレッドへ逃がす）"""
+    buffer = io.StringIO()
+    # タスクは個別のコンテキストで実行され、to_thread もコンテキストを引き継ぐ
+    _check_output.set(buffer)
+    try:
+        if asyncio.iscoroutinefunction(check_func):
+            outcome = await check_func()
+        else:
+            outcome = await asyncio.to_thread(check_func)
+    except Exception as e:
+        outcome = e
+    return outcome, buffer.getvalue()
+
+async def main():
     """メイン処理"""
     print("🔍 セキュアAIチャット - 簡易システムチェック")
     print("=" * 50)
@@ -124,16 +168,34 @@ def main():
         ("OpenAI認証", check_openai_authentication),
     ]
     
-    results = []
+    # 非同期チェック（OpenAI認証）はネットワーク待ちが大半のため先に開始し、ローカルのチェックと並行させる
+    # 同期チェックは同じモジュールをインポートするため1つずつ実行し、出力は定義順にまとめて表示
+    stdout = sys.stdout
+    sys.stdout = _CheckOutputRouter(stdout)
+    try:
+        pending = {
+            check_func: asyncio.create_task(_run_check(check_func))
+            for _, check_func in checks
+            if asyncio.iscoroutinefunction(check_func)
+        }
+        # 通信開始までのインポートを同期チェックより先に済ませ、スレッドとの同時インポートを避ける
+        await asyncio.sleep(0)
+        outcomes = [
+            await (pending[check_func] if check_func in pending else _run_check(check_func))
+            for _, check_func in checks
+        ]
+    finally:
+        sys.stdout = stdout
     
-    for check_name, check_func in checks:
+    results = []
+    for (check_name, _), (outcome, output) in zip(checks, outcomes):
         print(f"\n🔄 {check_name}をチェック中...")
-        try:
-            result = check_func()
-            results.append((check_name, result))
-        except Exception as e:
-            print(f"❌ {check_name}チェック中にエラー: {e}")
+        print(output, end="")
+        if isinstance(outcome, Exception):
+            print(f"❌ {check_name}チェック中にエラー: {outcome}")
             results.append((check_name, False))
+        else:
+            results.append((check_name, outcome))
     
     # 結果サマリー
     print("\n" + "=" * 50)
@@ -164,4 +226,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(asyncio.run(main()))
\ No newline at end of file
@@ -4,6 +4,7 @@ OpenAI API テストスクリプト
 """
 
 import asyncio
+import re
 import sys
 import os
 from pathlib import Path
@@ -16,6 +17,9 @@ from app.core.config import settings
 import openai
 from openai import AsyncOpenAI
 
+# チャット用GPTモデルの判定パターン
+_GPT_MODEL_RE = re.compile(r"gpt-(3\.5|4)")
+
 async def test_openai_api():
     """OpenAI APIテスト"""
     
@@ -135,10 +139,7 @@ async def test_model_availability():
         models = await client.models.list()
         
         # ChatGPTモデルのみフィルタ
-        chat_models = []
-        for model in models.data:
-            if any(keyword in model.id for keyword in ['gpt-3.5', 'gpt-4']):
-                chat_models.append(model.id)
+        chat_models = [model.id for model in models.data if _GPT_MODEL_RE.search(model.id)]
         
         print("✅ 利用可能なチャットモデル:")
         for model in sorted(chat_models):
@@ -4,14 +4,23 @@
 """
 
 import os
+import re
+import time
 import asyncio
+import functools
+import hashlib
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, PrivateAttr
+from typing import List, Optional, Dict, Any, Tuple
 import openai
 from openai import AsyncOpenAI
-import json
+import httpx
+import orjson
 import uuid
 from datetime import datetime
 from dotenv import load_dotenv
@@ -24,24 +33,54 @@ from app.api.auth import router as auth_router
 from app.core.middleware import TenantMiddleware, require_auth, get_current_user
 from app.models.auth import User
 
+logger = logging.getLogger(__name__)
+
 # 環境変数から設定を読み込み
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 if not OPENAI_API_KEY:
     print("WARNING: OPENAI_API_KEY not found in environment variables")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """OpenAIクライアントをプロセス内で1つだけ生成し、接続プールを使い回す"""
+    app.state.openai_client = None
+    if OPENAI_API_KEY:
+        app.state.openai_client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        )
+    try:
+        yield
+    finally:
+        if app.state.openai_client is not None:
+            await app.state.openai_client.close()
+
 # FastAPIアプリ作成
-app = FastAPI(title="Secure AI Chat API", version="1.0.0")
+app = FastAPI(
+    title="Secure AI Chat API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 # ミドルウェア設定
 app.add_middleware(TenantMiddleware)
 
-# CORS設定
+# CORS設定（オリジンを明示し、ブラウザがプリフライト結果を1日キャッシュできるようにする）
+CORS_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
+    if origin.strip()
+]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # 開発用：本番では制限する
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
+    allow_headers=["authorization", "content-type", "x-request-id"],
+    max_age=86400,
 )
 
 # 認証ルーター追加
@@ -79,6 +118,14 @@ class PromptTemplate(BaseModel):
     created_at: str
     updated_at: str
     is_active: bool = True
+    
+    # updated_at のエポック秒（ソートキー用、APIレスポンスには含めない）
+    _updated_at_ts: float = PrivateAttr(default=0.0)
+    
+    def touch(self, ts: Optional[float] = None) -> None:
+        """更新日時を設定（ISO文字列はエポック秒から1回だけ整形）"""
+        self._updated_at_ts = time.time() if ts is None else ts
+        self.updated_at = datetime.fromtimestamp(self._updated_at_ts).isoformat()
 
 class CreateTemplateRequest(BaseModel):
     name: str
@@ -104,11 +151,109 @@ class UseTemplateRequest(BaseModel):
     user_message: str
     model: str = "gpt-3.5-turbo"
 
+class TemplateStore:
+    """インメモリーのテンプレート格納庫（一覧取得用の二次インデックスを保持）
+
+    一覧系エンドポイントは読み取りが圧倒的に多いため、ソート済みのアクティブ一覧・
+    カテゴリ別一覧・カテゴリ名一覧を変更時にのみ再構築し、リクエスト毎の走査とソートを避ける。
+    """
+    
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._active_sorted: Optional[List[PromptTemplate]] = None  # updated_at降順
+        self._by_category: Dict[str, List[PromptTemplate]] = {}     # 小文字カテゴリ名 -> 一覧
+        self._categories: List[str] = []
+        self._json_cache: Dict[str, bytes] = {}                     # ID -> エンコード済みJSON
+        self._list_json_cache: Dict[Optional[str], bytes] = {}      # カテゴリ -> エンコード済み一覧
+    
+    def __contains__(self, template_id: str) -> bool:
+        return template_id in self._templates
+    
+    def __getitem__(self, template_id: str) -> PromptTemplate:
+        return self._templates[template_id]
+    
+    def add(self, template: PromptTemplate) -> None:
+        """テンプレートを追加"""
+        self._templates[template.id] = template
+        self._invalidate(template.id)
+    
+    def update(self, template: PromptTemplate) -> None:
+        """更新済みテンプレートを反映してインデックスを無効化"""
+        self._templates[template.id] = template
+        self._invalidate(template.id)
+    
+    def deactivate(self, template_id: str) -> None:
+        """テンプレートを非活性化"""
+        self._templates[template_id].is_active = False
+        self._invalidate(template_id)
+    
+    def encoded(self, template_id: str) -> bytes:
+        """テンプレートのJSON表現（変更されるまでエンコード結果を再利用）"""
+        encoded = self._json_cache.get(template_id)
+        if encoded is None:
+            encoded = orjson.dumps(self._templates[template_id].model_dump())
+            self._json_cache[template_id] = encoded
+        return encoded
+    
+    def active(self, category: Optional[str] = None) -> List[PromptTemplate]:
+        """アクティブなテンプレートをupdated_at降順で取得（カテゴリは大文字小文字を区別しない）"""
+        self._ensure_indexes()
+        if category:
+            return self._by_category.get(category.lower(), [])
+        return self._active_sorted
+    
+    def active_json(self, category: Optional[str] = None) -> bytes:
+        """アクティブなテンプレート一覧のJSON表現（変更されるまでエンコード結果を再利用）"""
+        key = category.lower() if category else None
+        encoded = self._list_json_cache.get(key)
+        if encoded is None:
+            encoded = orjson.dumps([t.model_dump() for t in self.active(category)])
+            self._list_json_cache[key] = encoded
+        return encoded
+    
+    def categories(self) -> List[str]:
+        """アクティブなテンプレートのカテゴリ名一覧（ソート済み）"""
+        self._ensure_indexes()
+        return self._categories
+    
+    def _invalidate(self, template_id: str) -> None:
+        self._active_sorted = None
+        self._json_cache.pop(template_id, None)
+        self._list_json_cache.clear()
+    
+    def _ensure_indexes(self) -> None:
+        if self._active_sorted is not None:
+            return
+        active = sorted(
+            (t for t in self._templates.values() if t.is_active),
+            key=lambda t: t._updated_at_ts,
+            reverse=True
+        )
+        by_category: Dict[str, List[PromptTemplate]] = {}
+        for template in active:
+            by_category.setdefault(template.category.lower(), []).append(template)
+        self._by_category = by_category
+        self._categories = sorted({t.category for t in active})
+        self._active_sorted = active
+
 # インメモリーテンプレートストレージ（デモ用）
-templates_storage: Dict[str, PromptTemplate] = {}
+templates_storage = TemplateStore()
+
+# テンプレートID -> 変数プレースホルダーの事前コンパイル済みパターン（変数なしはNone）
+_template_patterns: Dict[str, Optional[re.Pattern]] = {}
+
+def _compile_template(template: PromptTemplate) -> None:
+    """テンプレートの変数プレースホルダーを1パスで置換できるよう正規表現を事前コンパイル"""
+    # クライアント作成のテンプレートは name が文字列とは限らないため、非空の文字列のみ対象とする
+    names = [v["name"] for v in template.variables if isinstance(v.get("name"), str) and v["name"]]
+    _template_patterns[template.id] = (
+        re.compile(r"\{(" + "|".join(map(re.escape, names)) + r")\}") if names else None
+    )
 
 # デモテンプレート作成
 def create_demo_templates():
+    now_ts = time.time()
+    now = datetime.fromtimestamp(now_ts).isoformat()
     demo_templates = [
         PromptTemplate(
             id="business_email",
@@ -146,8 +291,8 @@ def create_demo_templates():
             ],
             example_input="来週の企画会議の時間を変更したいのでお知らせします",
             example_output="件名: 企画会議の日程変更のお知らせ\n\n田中部長\n\nいつもお世話になっております...",
-            created_at=datetime.now().isoformat(),
-            updated_at=datetime.now().isoformat(),
+            created_at=now,
+            updated_at=now,
             is_active=True
         ),
         PromptTemplate(
@@ -185,8 +330,8 @@ def create_demo_templates():
             ],
             example_input="このPython関数をレビューしてください",
             example_output="## 🔍 コードレビュー結果\n\n**総合評価: 7/10**\n\n### ✅ 良い点\n- 関数名が処理内容を適切に表現...",
-            created_at=datetime.now().isoformat(),
-            updated_at=datetime.now().isoformat(),
+            created_at=now,
+            updated_at=now,
             is_active=True
         ),
         PromptTemplate(
@@ -230,8 +375,8 @@ def create_demo_templates():
             ],
             example_input="近未来の宇宙ステーションで起こる謎の事件について",
             example_output="# 📚 物語企画書\n\n## あらすじ\n西暦2087年、火星軌道上の宇宙ステーション「アルテミス7」で...",
-            created_at=datetime.now().isoformat(),
-            updated_at=datetime.now().isoformat(),
+            created_at=now,
+            updated_at=now,
             is_active=True
         ),
         PromptTemplate(
@@ -269,17 +414,26 @@ def create_demo_templates():
             ],
             example_input="今日の営業部の週次会議について整理してください",
             example_output="# 📝 営業部週次会議 議事録\n\n**日時**: 2024年...\n**参加者**: ...\n\n## 📋 討議内容\n...",
-            created_at=datetime.now().isoformat(),
-            updated_at=datetime.now().isoformat(),
+            created_at=now,
+            updated_at=now,
             is_active=True
         )
     ]
     
     for template in demo_templates:
-        templates_storage[template.id] = template
+        template.touch(now_ts)
+        templates_storage.add(template)
+        _compile_template(template)
 
-# 初期化時にデモテンプレートを作成
-create_demo_templates()
+# デモテンプレートはテンプレート系エンドポイントへの初回アクセス時に作成する
+_demo_templates_loaded = False
+
+def _ensure_demo_templates() -> None:
+    """デモテンプレートを未作成なら作成（awaitを挟まないためイベントループ上では排他不要）"""
+    global _demo_templates_loaded
+    if not _demo_templates_loaded:
+        _demo_templates_loaded = True
+        create_demo_templates()
 
 # ヘルスチェック
 @app.get("/")
@@ -299,6 +453,73 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# 同一チャットリクエストの合流（singleflight）と短期レスポンスキャッシュ
+CHAT_CACHE_TTL = 300
+CHAT_CACHE_MAXSIZE = 1024
+_chat_inflight: Dict[str, "asyncio.Task[ChatResponse]"] = {}
+_chat_response_cache: "OrderedDict[str, Tuple[float, ChatResponse]]" = OrderedDict()
+
+async def _create_chat_completion(request: ChatRequest, messages: List[Dict[str, str]]) -> ChatResponse:
+    """OpenAIへチャット補完をリクエスト"""
+    start_time = time.perf_counter()
+    
+    # API呼び出し（起動時に生成した共有クライアントを使用）
+    response = await app.state.openai_client.chat.completions.create(
+        model=request.model,
+        messages=messages,
+        temperature=request.temperature,
+        max_tokens=request.max_tokens
+    )
+    
+    processing_time = int((time.perf_counter() - start_time) * 1000)
+    
+    # レスポンス作成
+    return ChatResponse(
+        content=response.choices[0].message.content,
+        model=response.model,
+        tokens_used=response.usage.total_tokens if response.usage else 0,
+        processing_time_ms=processing_time,
+        finish_reason=response.choices[0].finish_reason,
+        metadata={
+            "prompt_tokens": response.usage.prompt_tokens if response.usage else 0,
+            "completion_tokens": response.usage.completion_tokens if response.usage else 0,
+        }
+    )
+
+def _store_chat_completion(key: str, task: "asyncio.Task[ChatResponse]") -> None:
+    """上流呼び出し完了時に合流エントリを外し、成功結果をキャッシュへ格納"""
+    _chat_inflight.pop(key, None)
+    if task.cancelled() or task.exception() is not None:
+        return
+    _chat_response_cache[key] = (time.monotonic() + CHAT_CACHE_TTL, task.result())
+    _chat_response_cache.move_to_end(key)
+    while len(_chat_response_cache) > CHAT_CACHE_MAXSIZE:
+        _chat_response_cache.popitem(last=False)
+
+async def _coalesced_chat_completion(request: ChatRequest, messages: List[Dict[str, str]]) -> ChatResponse:
+    """同一内容のリクエストはキャッシュ済み結果か実行中の上流呼び出しを共有"""
+    key = hashlib.blake2b(
+        orjson.dumps([request.model, messages, request.temperature, request.max_tokens]),
+        digest_size=16
+    ).hexdigest()
+    
+    cached = _chat_response_cache.get(key)
+    if cached is not None:
+        expires_at, response = cached
+        if expires_at > time.monotonic():
+            _chat_response_cache.move_to_end(key)
+            return response
+        del _chat_response_cache[key]
+    
+    task = _chat_inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_create_chat_completion(request, messages))
+        task.add_done_callback(functools.partial(_store_chat_completion, key))
+        _chat_inflight[key] = task
+    
+    # 1つのクライアントが切断しても、共有している上流呼び出しはキャンセルしない
+    return await asyncio.shield(task)
+
 # AI チャットエンドポイント
 @app.post("/api/v1/ai/chat", response_model=ChatResponse)
 async def chat_completion(
@@ -314,37 +535,13 @@ async def chat_completion(
         )
     
     try:
-        # OpenAI クライアント作成
-        client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-        
         # メッセージ変換
         messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
         
-        import time
-        start_time = time.time()
-        
-        # API呼び出し
-        response = await client.chat.completions.create(
-            model=request.model,
-            messages=messages,
-            temperature=request.temperature,
-            max_tokens=request.max_tokens
-        )
-        
-        processing_time = int((time.time() - start_time) * 1000)
-        
-        # レスポンス作成
-        return ChatResponse(
-            content=response.choices[0].message.content,
-            model=response.model,
-            tokens_used=response.usage.total_tokens if response.usage else 0,
-            processing_time_ms=processing_time,
-            finish_reason=response.choices[0].finish_reason,
-            metadata={
-                "prompt_tokens": response.usage.prompt_tokens if response.usage else 0,
-                "completion_tokens": response.usage.completion_tokens if response.usage else 0,
-            }
-        )
+        # temperature=0 は決定的な出力のため、同一リクエストは上流呼び出しを共有する
+        if request.temperature == 0:
+            return await _coalesced_chat_completion(request, messages)
+        return await _create_chat_completion(request, messages)
         
     except openai.AuthenticationError:
         raise HTTPException(
@@ -367,6 +564,103 @@ async def chat_completion(
             detail=f"Internal server error: {str(e)}"
         )
 
+# AI チャットストリーミングエンドポイント（Server-Sent Events）
+@app.post("/api/v1/ai/chat/stream")
+async def chat_completion_stream(
+    request: ChatRequest,
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """AI チャット補完をトークン単位でストリーミング"""
+    
+    if not OPENAI_API_KEY:
+        raise HTTPException(
+            status_code=500,
+            detail="OpenAI API key not configured"
+        )
+    
+    messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
+    
+    # ストリーム開始前のエラーは通常のHTTPエラーとして返す
+    try:
+        stream = await app.state.openai_client.chat.completions.create(
+            model=request.model,
+            messages=messages,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            stream=True
+        )
+    except openai.AuthenticationError:
+        raise HTTPException(status_code=401, detail="Invalid OpenAI API key")
+    except openai.RateLimitError:
+        raise HTTPException(status_code=429, detail="OpenAI API rate limit exceeded")
+    except openai.APIError as e:
+        raise HTTPException(status_code=500, detail=f"OpenAI API error: {str(e)}")
+    
+    async def event_stream():
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    yield b"data: " + orjson.dumps({"delta": choice.delta.content}) + b"\n\n"
+                if choice.finish_reason:
+                    yield b"data: " + orjson.dumps({"finish_reason": choice.finish_reason}) + b"\n\n"
+        except openai.APIError as e:
+            # ヘッダー送信後のためステータスは変更できない。エラーイベントとして通知する
+            yield b"data: " + orjson.dumps({"error": str(e)}) + b"\n\n"
+        yield b"data: [DONE]\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# モデル一覧キャッシュ（stale-while-revalidate）
+MODELS_CACHE_SOFT_TTL = 300  # これを過ぎたらキャッシュを返しつつバックグラウンドで更新
+MODELS_CACHE_TTL = 900       # これを過ぎたらリクエスト内で取得し直す
+_models_cache: Dict[str, Any] = {"data": None, "ts": 0.0, "refresh_task": None}
+_models_lock = asyncio.Lock()
+
+# チャット対象のGPTモデル判定と、ファミリー別の上限トークン数・料金
+_GPT_MODEL_RE = re.compile(r"gpt-(3\.5|4)")
+_GPT_MODEL_LIMITS = {
+    "3.5": {"max_tokens": 4096, "cost_per_1k_tokens": 0.002},
+    "4": {"max_tokens": 8192, "cost_per_1k_tokens": 0.03},
+}
+
+async def _fetch_models() -> List[Dict[str, Any]]:
+    """OpenAIからモデル一覧を取得してキャッシュを更新"""
+    models = await app.state.openai_client.models.list()
+    
+    # GPTモデルのみフィルタ
+    gpt_models = [
+        {
+            "id": model.id,
+            "name": model.id,
+            "description": f"OpenAI {model.id}",
+            **_GPT_MODEL_LIMITS[match.group(1)]
+        }
+        for model in models.data
+        if (match := _GPT_MODEL_RE.search(model.id))
+    ]
+    
+    _models_cache["data"] = gpt_models
+    _models_cache["ts"] = time.monotonic()
+    return gpt_models
+
+async def _refresh_models() -> None:
+    """バックグラウンドでのモデル一覧更新（失敗時は古いキャッシュを維持）"""
+    async with _models_lock:
+        # ロック待ちの間に他のリクエストが更新済みなら取得しない
+        if time.monotonic() - _models_cache["ts"] < MODELS_CACHE_SOFT_TTL:
+            return
+        try:
+            await _fetch_models()
+        except Exception as e:
+            logger.warning(f"Background model list refresh failed: {e}")
+
 # モデル一覧取得
 @app.get("/api/v1/ai/models")
 async def get_models():
@@ -378,53 +672,49 @@ async def get_models():
             detail="OpenAI API key not configured"
         )
     
-    try:
-        client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-        models = await client.models.list()
-        
-        # GPTモデルのみフィルタ
-        gpt_models = []
-        for model in models.data:
-            if any(keyword in model.id for keyword in ['gpt-3.5', 'gpt-4']):
-                gpt_models.append({
-                    "id": model.id,
-                    "name": model.id,
-                    "description": f"OpenAI {model.id}",
-                    "max_tokens": 4096 if "gpt-3.5" in model.id else 8192,
-                    "cost_per_1k_tokens": 0.002 if "gpt-3.5" in model.id else 0.03
-                })
-        
-        return gpt_models
+    cached = _models_cache["data"]
+    age = time.monotonic() - _models_cache["ts"]
+    if cached is not None and age < MODELS_CACHE_TTL:
+        refresh_task = _models_cache["refresh_task"]
+        if age >= MODELS_CACHE_SOFT_TTL and (refresh_task is None or refresh_task.done()):
+            _models_cache["refresh_task"] = asyncio.create_task(_refresh_models())
+        return cached
+    
+    async with _models_lock:
+        # ロック待ちの間に他のリクエストが更新済みならそれを返す
+        if _models_cache["data"] is not None and time.monotonic() - _models_cache["ts"] < MODELS_CACHE_TTL:
+            return _models_cache["data"]
         
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to fetch models: {str(e)}"
-        )
+        try:
+            return await _fetch_models()
+        except Exception as e:
+            if _models_cache["data"] is not None:
+                logger.warning(f"Model list refresh failed, serving stale cache: {e}")
+                return _models_cache["data"]
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to fetch models: {str(e)}"
+            )
 
 # プロンプトテンプレート管理API
 
 @app.get("/api/v1/templates", response_model=List[PromptTemplate])
 async def get_templates(category: Optional[str] = None):
     """テンプレート一覧を取得"""
-    templates = list(templates_storage.values())
-    
-    if category:
-        templates = [t for t in templates if t.category.lower() == category.lower()]
-    
+    _ensure_demo_templates()
     # アクティブなテンプレートのみ返す
-    active_templates = [t for t in templates if t.is_active]
-    return sorted(active_templates, key=lambda x: x.updated_at, reverse=True)
+    return Response(content=templates_storage.active_json(category), media_type="application/json")
 
 @app.get("/api/v1/templates/categories")
 async def get_categories():
     """利用可能なテンプレートカテゴリ一覧を取得"""
-    categories = list(set(t.category for t in templates_storage.values() if t.is_active))
-    return sorted(categories)
+    _ensure_demo_templates()
+    return templates_storage.categories()
 
 @app.get("/api/v1/templates/{template_id}", response_model=PromptTemplate)
 async def get_template(template_id: str):
     """指定されたテンプレートを取得"""
+    _ensure_demo_templates()
     if template_id not in templates_storage:
         raise HTTPException(status_code=404, detail="Template not found")
     
@@ -432,13 +722,14 @@ async def get_template(template_id: str):
     if not template.is_active:
         raise HTTPException(status_code=404, detail="Template not active")
     
-    return template
+    return Response(content=templates_storage.encoded(template_id), media_type="application/json")
 
 @app.post("/api/v1/templates", response_model=PromptTemplate)
 async def create_template(template_data: CreateTemplateRequest):
     """新しいテンプレートを作成"""
     template_id = str(uuid.uuid4())
-    now = datetime.now().isoformat()
+    now_ts = time.time()
+    now = datetime.fromtimestamp(now_ts).isoformat()
     
     template = PromptTemplate(
         id=template_id,
@@ -453,13 +744,16 @@ async def create_template(template_data: CreateTemplateRequest):
         updated_at=now,
         is_active=True
     )
+    template.touch(now_ts)
     
-    templates_storage[template_id] = template
+    templates_storage.add(template)
+    _compile_template(template)
     return template
 
 @app.put("/api/v1/templates/{template_id}", response_model=PromptTemplate)
 async def update_template(template_id: str, template_data: UpdateTemplateRequest):
     """テンプレートを更新"""
+    _ensure_demo_templates()
     if template_id not in templates_storage:
         raise HTTPException(status_code=404, detail="Template not found")
     
@@ -476,6 +770,7 @@ async def update_template(template_id: str, template_data: UpdateTemplateRequest
         template.system_prompt = template_data.system_prompt
     if template_data.variables is not None:
         template.variables = template_data.variables
+        _compile_template(template)
     if template_data.example_input is not None:
         template.example_input = template_data.example_input
     if template_data.example_output is not None:
@@ -483,26 +778,28 @@ async def update_template(template_id: str, template_data: UpdateTemplateRequest
     if template_data.is_active is not None:
         template.is_active = template_data.is_active
     
-    template.updated_at = datetime.now().isoformat()
-    templates_storage[template_id] = template
+    template.touch()
+    templates_storage.update(template)
     return template
 
 @app.delete("/api/v1/templates/{template_id}")
 async def delete_template(template_id: str):
     """テンプレートを削除（非活性化）"""
+    _ensure_demo_templates()
     if template_id not in templates_storage:
         raise HTTPException(status_code=404, detail="Template not found")
     
     # 完全削除ではなく非活性化
     template = templates_storage[template_id]
-    template.is_active = False
-    template.updated_at = datetime.now().isoformat()
+    template.touch()
+    templates_storage.deactivate(template_id)
     
     return {"message": "Template deactivated successfully"}
 
 @app.post("/api/v1/templates/{template_id}/use", response_model=ChatResponse)
 async def use_template(template_id: str, request: UseTemplateRequest):
     """テンプレートを使用してAIチャット"""
+    _ensure_demo_templates()
     if template_id not in templates_storage:
         raise HTTPException(status_code=404, detail="Template not found")
     
@@ -514,21 +811,21 @@ async def use_template(template_id: str, request: UseTemplateRequest):
         raise HTTPException(status_code=500, detail="OpenAI API key not configured")
     
     try:
-        client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+        client = app.state.openai_client
         
-        # システムプロンプトを変数で置換
+        # システムプロンプトを変数で置換（未指定の変数はプレースホルダーのまま残す）
         system_prompt = template.system_prompt
-        for var_name, var_value in request.variables.items():
-            placeholder = f"{{{var_name}}}"
-            system_prompt = system_prompt.replace(placeholder, var_value)
+        pattern = _template_patterns.get(template_id)
+        if pattern is not None:
+            variables = request.variables
+            system_prompt = pattern.sub(lambda m: variables.get(m.group(1), m.group(0)), system_prompt)
         
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": request.user_message}
         ]
         
-        import time
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         response = await client.chat.completions.create(
             model=request.model,
@@ -537,7 +834,7 @@ async def use_template(template_id: str, request: UseTemplateRequest):
             max_tokens=800
         )
         
-        processing_time = int((time.time() - start_time) * 1000)
+        processing_time = int((time.perf_counter() - start_time) * 1000)
         
         return ChatResponse(
             content=response.choices[0].message.content,
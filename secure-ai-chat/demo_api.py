@@ -2,15 +2,26 @@
 """
 デモ用簡易APIサーバー - お客様プレゼンテーション用
 FastAPI不要のシンプル版 + 実際のOpenAI API連携
+
+    python3 demo_api.py          # 標準ライブラリ版（ThreadingHTTPServer）
+    python3 demo_api.py --asgi   # ASGI版（FastAPI + uvicorn、AsyncOpenAI）
 """
 
+import functools
 import json
+import logging
+import logging.handlers
+import queue
+import re
 import time
 import uuid
 import os
 import asyncio
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+import socket
+import sqlite3
+import sys
+from contextlib import asynccontextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import threading
 from datetime import datetime
 from dotenv import load_dotenv
@@ -18,22 +29,276 @@ from dotenv import load_dotenv
 # .envファイルを読み込み
 load_dotenv()
 
+logger = logging.getLogger("demo_api")
+
+# リクエスト処理中のログはキューに積むだけにし、出力はバックグラウンドスレッドで行う
+LOG_QUEUE_MAXSIZE = 10000
+_log_listener = None  # (PID, QueueListener)
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """キューが満杯のときはログを捨てる（出力が追いつかなくてもリクエスト処理を止めない）"""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+def setup_logging():
+    """このプロセスのログ出力スレッドを開始（フォーク後の子プロセスでは開始し直す）"""
+    global _log_listener
+    pid = os.getpid()
+    if _log_listener is not None and _log_listener[0] == pid:
+        return
+    
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    
+    logger.handlers = [_DroppingQueueHandler(log_queue)]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    listener.start()
+    _log_listener = (pid, listener)
+
+def stop_logging():
+    """キューに残ったログを出力してからログ出力スレッドを止める"""
+    global _log_listener
+    if _log_listener is not None and _log_listener[0] == os.getpid():
+        _log_listener[1].stop()
+    _log_listener = None
+
 # OpenAI API設定
 try:
-    from openai import OpenAI
-    OPENAI_CLIENT = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    import importlib.util
+    import httpx
+    from openai import OpenAI, AsyncOpenAI
+    
+    # OpenAI APIへの接続プール設定（全リクエストで共有し、TLSハンドシェイクを初回のみにする）
+    OPENAI_HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+    OPENAI_HTTP_TIMEOUT = 60.0
+    # HTTP/2 は h2 パッケージ（httpx[http2]）がある場合のみ有効化
+    OPENAI_HTTP2 = importlib.util.find_spec('h2') is not None
+    
     OPENAI_AVAILABLE = bool(os.getenv('OPENAI_API_KEY'))
+    OPENAI_CLIENT = OpenAI(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        http_client=httpx.Client(
+            http2=OPENAI_HTTP2, limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT
+        )
+    ) if OPENAI_AVAILABLE else None
     print(f"🔑 OpenAI API: {'利用可能' if OPENAI_AVAILABLE else '未設定（デモモードで動作）'}")
 except ImportError:
+    AsyncOpenAI = None
     OPENAI_CLIENT = None
     OPENAI_AVAILABLE = False
     print("⚠️ OpenAI ライブラリが見つかりません。デモモードで動作します。")
 
-# インメモリテンプレートストレージ（デモ用）
+# JSONエンコードの高速化（未インストールの場合は標準のjsonを使用）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ASGI版（--asgi）用。FastAPIが無い環境では標準ライブラリ版のみ利用可能
+try:
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
+    ASGI_AVAILABLE = True
+except ImportError:
+    ASGI_AVAILABLE = False
+
+# テンプレートの保存先（sqlite、複数プロセス・再起動間で共有）
+TEMPLATES_DB_PATH = os.getenv(
+    'DEMO_TEMPLATES_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'demo_templates.db')
+)
+
+# sqliteの内容を読み込んだプロセス内キャッシュ（id -> テンプレート）
 templates_storage = {}
 
+# テンプレートの変更・sqlite接続の利用・キャッシュの再構築を直列化（変更中にキャッシュを破棄するため再入可能）
+_templates_lock = threading.RLock()
+# テンプレート一覧のエンコード済みJSONキャッシュ（変更時に破棄）
+_templates_list_cache = None  # (JSONバイト列, 件数)
+_templates_db = None  # (PID, sqlite接続)
+_templates_data_version = None  # templates_storage を読み込んだ時点の PRAGMA data_version
+
+# 利用可能なAIモデル
+AVAILABLE_MODELS = [
+    {"id": "gpt-3.5-turbo", "name": "GPT-3.5 Turbo", "available": True},
+    {"id": "gpt-4", "name": "GPT-4", "available": True},
+    {"id": "gpt-4o", "name": "GPT-4o", "available": True}
+]
+
+# レスポンスに付与するタイムスタンプ（秒単位でキャッシュ）: (エポック秒, ISO文字列)
+_timestamp_cache = (0, "")
+
+def now_iso():
+    """現在時刻のISO文字列（同じ秒の間は整形済みの文字列を再利用）"""
+    global _timestamp_cache
+    epoch = int(time.time())
+    cached_epoch, cached_iso = _timestamp_cache
+    if epoch != cached_epoch:
+        cached_iso = datetime.fromtimestamp(epoch).isoformat()
+        _timestamp_cache = (epoch, cached_iso)
+    return cached_iso
+
+def encode_json(data):
+    """レスポンス用にJSONをUTF-8バイト列へエンコード（orjsonがあれば使用）"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+# リクエストボディの上限サイズ
+MAX_REQUEST_BODY_BYTES = 1 << 20
+
+def decode_json_object(raw):
+    """リクエストボディ（バイト列）をJSONオブジェクトとしてデコード（不正な場合はValueError）"""
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError("JSON body must be an object")
+    return data
+
+# ダッシュボード用の固定データ
+DASHBOARD_KPI = {
+    "totalMessages": 12847,
+    "activeUsers": 156,
+    "monthlyCost": 45230,
+    "avgResponse": 1.2,
+    "trends": {
+        "messages": "+15.2%",
+        "users": "+8.7%",
+        "cost": "+2.1%",
+        "response": "-0.3秒"
+    }
+}
+
+DASHBOARD_USAGE = {
+    "daily": [120, 135, 98, 145, 167, 134, 156, 178, 145, 189, 156, 167, 134, 145, 178, 156, 134, 189, 167, 145, 156, 178, 134, 167, 145, 189, 156, 178, 167, 145],
+    "teams": {
+        "sales": {"messages": 4230, "efficiency_hours": 950, "cost": 18450},
+        "dev": {"messages": 6180, "efficiency_hours": 1380, "cost": 19680},
+        "marketing": {"messages": 2437, "efficiency_hours": 510, "cost": 7100}
+    }
+}
+
+DASHBOARD_AUDIT_LOGS = [
+    {
+        "timestamp": "2024-01-15 14:35:22",
+        "action": "ユーザー権限変更",
+        "detail": "田中太郎の権限を管理者に変更",
+        "user": "システム管理者"
+    },
+    {
+        "timestamp": "2024-01-15 13:20:15", 
+        "action": "新規チーム作成",
+        "detail": "マーケティング部チームを作成",
+        "user": "佐藤花子"
+    },
+    {
+        "timestamp": "2024-01-15 11:45:08",
+        "action": "セキュリティ設定変更", 
+        "detail": "二要素認証を有効化",
+        "user": "システム管理者"
+    }
+]
+
+# 固定レスポンスのエンドポイント -> 起動時にエンコード済みのJSON
+STATIC_ROUTES = {
+    '/api/models': encode_json(AVAILABLE_MODELS),
+    '/api/dashboard/kpi': encode_json(DASHBOARD_KPI),
+    '/api/dashboard/usage': encode_json(DASHBOARD_USAGE),
+    '/api/dashboard/audit': encode_json(DASHBOARD_AUDIT_LOGS),
+}
+
+# ヘルスチェック応答のエンコード済みJSON（タイムスタンプと同じく秒単位でキャッシュ）: (ISO文字列, JSONバイト列)
+_health_cache = ("", b"")
+
+def get_health_json():
+    """ヘルスチェック応答のJSON（同じ秒の間はエンコード済みのバイト列を再利用）"""
+    global _health_cache
+    timestamp = now_iso()
+    cached_timestamp, cached_body = _health_cache
+    if timestamp != cached_timestamp:
+        cached_body = encode_json({"status": "healthy", "timestamp": timestamp})
+        _health_cache = (timestamp, cached_body)
+    return cached_body
+
+def _get_templates_db():
+    """このプロセス用のsqlite接続を取得（フォーク後の子プロセスでは開き直す）"""
+    global _templates_db, _templates_data_version
+    pid = os.getpid()
+    if _templates_db is None or _templates_db[0] != pid:
+        conn = sqlite3.connect(TEMPLATES_DB_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS templates ("
+            "id TEXT PRIMARY KEY, data BLOB NOT NULL, "
+            "is_active INTEGER NOT NULL, updated_at TEXT NOT NULL)"
+        )
+        _templates_db = (pid, conn)
+        _templates_data_version = None
+    return _templates_db[1]
+
+def sync_templates_storage():
+    """他の接続がsqliteを更新していればキャッシュを読み直す（_templates_lock を保持して呼ぶ）"""
+    global _templates_data_version, _templates_list_cache
+    conn = _get_templates_db()
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    if data_version != _templates_data_version:
+        templates_storage.clear()
+        for (data,) in conn.execute("SELECT data FROM templates ORDER BY rowid"):
+            template = decode_json_object(data)
+            templates_storage[template["id"]] = template
+        _templates_data_version = data_version
+        _templates_list_cache = None
+
+def _save_templates(templates):
+    """テンプレートをsqliteに書き込む（_templates_lock を保持して呼ぶ）"""
+    conn = _get_templates_db()
+    with conn:
+        conn.executemany(
+            "INSERT INTO templates (id, data, is_active, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET "
+            "data = excluded.data, is_active = excluded.is_active, updated_at = excluded.updated_at",
+            [
+                (t["id"], encode_json(t), int(t.get("is_active", True)), t["updated_at"])
+                for t in templates
+            ]
+        )
+
+def get_templates_list_json():
+    """アクティブなテンプレート一覧（更新日時の降順）のJSONと件数を取得"""
+    global _templates_list_cache
+    with _templates_lock:
+        sync_templates_storage()
+        if _templates_list_cache is None:
+            # 保存済みのエンコード済みJSONを連結するだけで一覧を組み立てる（同時刻は登録順）
+            rows = _get_templates_db().execute(
+                "SELECT data FROM templates WHERE is_active = 1 ORDER BY updated_at DESC, rowid"
+            ).fetchall()
+            _templates_list_cache = (b"[" + b",".join(data for (data,) in rows) + b"]", len(rows))
+        return _templates_list_cache
+
+def invalidate_templates_list():
+    """テンプレート変更後に一覧キャッシュを破棄"""
+    global _templates_list_cache
+    with _templates_lock:
+        _templates_list_cache = None
+
 def initialize_demo_templates():
-    """デモ用テンプレートを初期化"""
+    """デモ用テンプレートを初期化（sqliteに保存済みのテンプレートがあればそれを使う）"""
+    with _templates_lock:
+        sync_templates_storage()
+        if templates_storage:
+            logger.info("📝 保存済みテンプレートを使用: %s件", len(templates_storage))
+            return
+    
+    now = datetime.now().isoformat()
     demo_templates = [
         {
             "id": "1",
@@ -48,8 +313,8 @@ def initialize_demo_templates():
             ],
             "example_input": "新しいECサイトの開発プロジェクトについて管理のアドバイスをお願いします",
             "example_output": "プロジェクト管理の観点から、以下のアドバイスをします...",
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
+            "created_at": now,
+            "updated_at": now,
             "is_active": True
         },
         {
@@ -64,8 +329,8 @@ def initialize_demo_templates():
             ],
             "example_input": "クラウド環境のセキュリティについて検討してください",
             "example_output": "クラウドセキュリティについて、以下の観点から評価します...",
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
+            "created_at": now,
+            "updated_at": now,
             "is_active": True
         },
         {
@@ -82,179 +347,429 @@ def initialize_demo_templates():
             ],
             "example_input": "明日の会議の資料について連絡したい",
             "example_output": "件名: 会議資料について\n\n田中様\n\nいつもお世話になっております...",
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
+            "created_at": now,
+            "updated_at": now,
             "is_active": True
         }
     ]
     
-    for template in demo_templates:
-        templates_storage[template["id"]] = template
+    with _templates_lock:
+        _save_templates(demo_templates)
+        for template in demo_templates:
+            templates_storage[template["id"]] = template
+        invalidate_templates_list()
     
-    print(f"📝 デモテンプレート初期化完了: {len(demo_templates)}件")
+    logger.info("📝 デモテンプレート初期化完了: %s件", len(demo_templates))
+
+# デモ応答テンプレート（{model} のみ差し込む）
+_PROJECT_RESPONSE = """📊 **プロジェクト管理について** ({model}で分析)
+
+**効果的なプロジェクト管理のポイント：**
+
+✅ **計画フェーズ**
+- 明確な目標設定と成功指標の定義
+- リスク分析と対策の事前準備
+- 適切なチーム編成とロール分担
+
+✅ **実行フェーズ**  
+- 定期的な進捗確認とコミュニケーション
+- 問題の早期発見と迅速な対応
+- 品質管理と継続的改善
+
+✅ **ツール活用**
+- ガントチャートでスケジュール管理
+- カンバンボードでタスク可視化
+- 定期的なレトロスペクティブ
+
+ご不明な点があれば、具体的な状況をお聞かせください！"""
+
+_SECURITY_RESPONSE = """🔒 **セキュリティ対策について** ({model}で分析)
+
+**企業セキュリティの重要ポイント：**
+
+🛡️ **技術的対策**
+- 多要素認証（MFA）の導入
+- エンドポイント保護
+- ネットワークセグメンテーション
+- 定期的な脆弱性スキャン
+
+👥 **人的セキュリティ**
+- 従業員向けセキュリティ教育
+- アクセス権限の適切な管理
+- インシデント対応手順の整備
+
+📋 **コンプライアンス**
+- GDPR、個人情報保護法への対応
+- セキュリティポリシーの策定
+- 定期的な監査とレビュー
+
+具体的なセキュリティ要件についてお聞かせください！"""
+
+_TECHNOLOGY_RESPONSE = """💡 **新技術導入について** ({model}で分析)
+
+**技術導入の成功要因：**
+
+🎯 **戦略的アプローチ**
+- ビジネス目標との整合性確認
+- ROI（投資対効果）の明確化
+- 段階的な導入計画
+
+🔧 **技術選定**
+- 既存システムとの互換性
+- スケーラビリティと将来性
+- サポート体制とコミュニティ
+
+👨‍💼 **組織的準備**
+- チームのスキルアップ計画
+- 変更管理プロセス
+- ステークホルダーとの合意形成
+
+どのような技術分野での導入をご検討でしょうか？"""
+
+_DEFAULT_RESPONSE = """🤖 **AI アシスタント** ({model}で応答)
+
+ご質問ありがとうございます！
+
+**このAIチャットシステムの特徴：**
+- 🔐 セキュアな企業向け通信
+- 🚀 リアルタイム応答
+- 📝 カスタムテンプレート対応
+- 👥 マルチテナント管理
+
+何か具体的なご質問やご相談があれば、お気軽にお聞かせください。
+
+**例：**
+- プロジェクト管理について
+- セキュリティ対策について  
+- 新技術導入について
+
+より詳しくサポートいたします！"""
+
+# キーワード -> デモ応答（定義順が優先順位）
+_DEMO_RESPONSES = {
+    'プロジェクト': _PROJECT_RESPONSE,
+    'セキュリティ': _SECURITY_RESPONSE,
+    '技術': _TECHNOLOGY_RESPONSE,
+    '導入': _TECHNOLOGY_RESPONSE,
+}
+_DEMO_KEYWORD_RE = re.compile("|".join(map(re.escape, _DEMO_RESPONSES)))
+
+def approx_tokens(text):
+    """空白区切りの単語数の概算（split()のように部分文字列のリストを作らずに数える）"""
+    if not text:
+        return 0
+    return text.count(' ') + text.count('\n') + 1
+
+@functools.lru_cache(maxsize=32)
+def render_demo_response(template, model):
+    """デモ応答にモデル名を差し込み、応答と単語数を返す（モデルの種類は少ないためほぼキャッシュヒットする）"""
+    content = template.format(model=model)
+    return content, approx_tokens(content)
+
+def generate_demo_response(message, model):
+    """デモ用のAI応答を生成（応答と単語数を返す）"""
+    # キーワードベースの応答生成: メッセージを1回走査して含まれるキーワードを集め、優先順位の高い応答を選ぶ
+    found = set(_DEMO_KEYWORD_RE.findall(message))
+    template = next(
+        (response for keyword, response in _DEMO_RESPONSES.items() if keyword in found),
+        _DEFAULT_RESPONSE
+    )
+    return render_demo_response(template, model)
+
+# チャットAPIのシステムプロンプト
+CHAT_SYSTEM_PROMPT = """あなたは日本語で応答する親切で知識豊富なAIアシスタントです。企業向けのセキュアなAIチャットシステムとして、専門的で有用な回答を提供してください。
+
+重要な注意事項：
+- ユーザーの質問に直接的に回答してください
+- 現在の日時、天気、リアルタイム情報については「申し訳ございませんが、リアルタイム情報にはアクセスできません」と正直に伝えてください
+- 分からないことは「分からない」と素直に答えてください
+- 質問の内容をしっかり理解してから回答してください
+- 曖昧な一般的な回答ではなく、具体的で役立つ情報を提供してください"""
+
+def chat_messages(system_prompt, user_message):
+    """OpenAI APIに渡すメッセージ列を作成"""
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_message}
+    ]
+
+def format_ai_response(response, start_time, **metadata):
+    """OpenAI APIの応答をチャットAPIのレスポンス形式に変換"""
+    processing_time = int((time.time() - start_time) * 1000)
+    
+    return {
+        "content": response.choices[0].message.content,
+        "model": response.model,
+        "tokens_used": response.usage.total_tokens,
+        "processing_time_ms": processing_time,
+        "finish_reason": response.choices[0].finish_reason,
+        "metadata": {
+            "prompt_tokens": response.usage.prompt_tokens,
+            "completion_tokens": response.usage.completion_tokens,
+            **metadata,
+            "real_ai": True,
+            "timestamp": now_iso()
+        }
+    }
+
+def build_demo_chat_response(message, model):
+    """チャットAPIのデモ応答を作成"""
+    demo_response, completion_tokens = generate_demo_response(message, model)
+    prompt_tokens = approx_tokens(message)
+    
+    return {
+        "content": demo_response,
+        "model": model,
+        "tokens_used": completion_tokens + prompt_tokens,
+        "processing_time_ms": 500,
+        "finish_reason": "stop",
+        "metadata": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "demo_mode": True,
+            "timestamp": now_iso()
+        }
+    }
+
+def get_active_template(template_id):
+    """ストレージからテンプレートを取得"""
+    with _templates_lock:
+        sync_templates_storage()
+        template = templates_storage.get(template_id)
+    if template and template.get('is_active', True):
+        return {
+            "name": template['name'],
+            "content": template['system_prompt']
+        }
+    return None
+
+# テンプレートの変数プレースホルダー {{name}}
+_PLACEHOLDER_RE = re.compile(r"\{\{([^{}]+)\}\}")
+
+def render_template_prompt(template, variables):
+    """テンプレートのシステムプロンプトに変数を適用（全プレースホルダーを1パスで置換）"""
+    system_prompt = template['content']
+    if not variables:
+        return system_prompt
+    return _PLACEHOLDER_RE.sub(lambda m: variables.get(m.group(1), m.group(0)), system_prompt)
+
+def build_template_demo_response(template, template_id, system_prompt, user_message, model):
+    """テンプレート使用APIのデモ応答を作成"""
+    demo_response = f"""📝 **テンプレート適用結果** ({template['name']})
+
+**適用されたプロンプト:**
+{system_prompt}
+
+**ユーザーメッセージ:**
+{user_message}
+
+⚠️ **デモモード**: OpenAI APIキーが設定されていないため、デモ応答を表示しています。
+実際の運用では、ここに高品質なAI応答が表示されます。
+
+🔧 **設定方法**: .envファイルにOPENAI_API_KEYを設定してください。"""
+    completion_tokens = approx_tokens(demo_response)
+    
+    return {
+        "content": demo_response,
+        "model": model,
+        "tokens_used": completion_tokens,
+        "processing_time_ms": 300,
+        "finish_reason": "stop",
+        "metadata": {
+            "template_id": template_id,
+            "template_name": template['name'],
+            "prompt_tokens": approx_tokens(system_prompt),
+            "completion_tokens": completion_tokens,
+            "demo_mode": True,
+            "timestamp": now_iso()
+        }
+    }
+
+def create_template(request_data):
+    """テンプレートを作成してストレージに保存"""
+    # 新しいテンプレートIDを生成
+    template_id = str(uuid.uuid4())
+    now = datetime.now().isoformat()
+    
+    # テンプレートデータを作成
+    template = {
+        "id": template_id,
+        "name": request_data.get('name', ''),
+        "description": request_data.get('description', ''),
+        "category": request_data.get('category', ''),
+        "system_prompt": request_data.get('system_prompt', ''),
+        "variables": request_data.get('variables', []),
+        "example_input": request_data.get('example_input', ''),
+        "example_output": request_data.get('example_output', ''),
+        "created_at": now,
+        "updated_at": now,
+        "is_active": True
+    }
+    
+    # ストレージに保存
+    with _templates_lock:
+        sync_templates_storage()
+        _save_templates([template])
+        templates_storage[template_id] = template
+        invalidate_templates_list()
+    
+    logger.info("✅ テンプレート作成: %s (ID: %s)", template['name'], template_id)
+    return template
+
+def update_template(template_id, request_data):
+    """既存テンプレートを更新（存在しない場合はNone）"""
+    with _templates_lock:
+        sync_templates_storage()
+        template = templates_storage.get(template_id)
+        if template is None:
+            return None
+        
+        template.update({
+            "name": request_data.get('name', template['name']),
+            "description": request_data.get('description', template['description']),
+            "category": request_data.get('category', template['category']),
+            "system_prompt": request_data.get('system_prompt', template['system_prompt']),
+            "variables": request_data.get('variables', template['variables']),
+            "example_input": request_data.get('example_input', template['example_input']),
+            "example_output": request_data.get('example_output', template['example_output']),
+            "updated_at": datetime.now().isoformat()
+        })
+        _save_templates([template])
+        invalidate_templates_list()
+    
+    logger.info("✅ テンプレート更新: %s (ID: %s)", template['name'], template_id)
+    return template
+
+def delete_template(template_id):
+    """テンプレートを論理削除（is_activeをFalseに設定）。存在しない場合はFalse"""
+    with _templates_lock:
+        sync_templates_storage()
+        template = templates_storage.get(template_id)
+        if template is None:
+            return False
+        
+        template['is_active'] = False
+        template['updated_at'] = datetime.now().isoformat()
+        _save_templates([template])
+        invalidate_templates_list()
+    
+    logger.info("✅ テンプレート削除: %s (ID: %s)", template['name'], template_id)
+    return True
+
+# テンプレート個別操作のパス: /api/templates/<id>[/<action>][/]
+_TEMPLATE_PATH_RE = re.compile(r"/api/templates/(?P<id>[^/]+)(?:/(?P<action>[^/]+))?/?")
+
+# JSON応答のステータス行と固定ヘッダー（Content-Length の値の直前まで）
+_JSON_RESPONSE_HEAD = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json; charset=utf-8\r\n"
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Content-Length: "
+)
+
+# CORS preflight応答（内容が固定のため起動時に組み立てておく）
+_CORS_PREFLIGHT_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+    b"Access-Control-Allow-Headers: Content-Type, Authorization\r\n"
+    b"Content-Length: 0\r\n"
+    b"\r\n"
+)
 
 class DemoAPIHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keep-alive で接続を再利用する（全レスポンスにContent-Lengthが必要）
+    protocol_version = "HTTP/1.1"
+
     def do_OPTIONS(self):
         """CORS preflight対応"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
+        self.log_request(200)
+        self.wfile.write(_CORS_PREFLIGHT_RESPONSE)
 
     def do_GET(self):
         """GETリクエスト処理"""
-        parsed_path = urlparse(self.path)
+        path = self.request_path()
         
-        if parsed_path.path == '/health':
-            self.send_json_response({"status": "healthy", "timestamp": datetime.now().isoformat()})
-        elif parsed_path.path == '/api/templates':
-            print("📝 テンプレート一覧取得リクエスト")
-            # ストレージからアクティブなテンプレートを取得
-            active_templates = [
-                template for template in templates_storage.values() 
-                if template.get('is_active', True)
-            ]
-            # 更新日時でソート
-            active_templates.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
-            print(f"📋 アクティブなテンプレート: {len(active_templates)}件")
-            self.send_json_response(active_templates)
-        elif parsed_path.path == '/api/models':
-            # 利用可能なAIモデル
-            models = [
-                {"id": "gpt-3.5-turbo", "name": "GPT-3.5 Turbo", "available": True},
-                {"id": "gpt-4", "name": "GPT-4", "available": True},
-                {"id": "gpt-4o", "name": "GPT-4o", "available": True}
-            ]
-            self.send_json_response(models)
-        elif parsed_path.path == '/api/dashboard/kpi':
-            # ダッシュボードKPIデータ
-            kpi_data = {
-                "totalMessages": 12847,
-                "activeUsers": 156,
-                "monthlyCost": 45230,
-                "avgResponse": 1.2,
-                "trends": {
-                    "messages": "+15.2%",
-                    "users": "+8.7%",
-                    "cost": "+2.1%",
-                    "response": "-0.3秒"
-                }
-            }
-            self.send_json_response(kpi_data)
-        elif parsed_path.path == '/api/dashboard/usage':
-            # 使用量データ
-            usage_data = {
-                "daily": [120, 135, 98, 145, 167, 134, 156, 178, 145, 189, 156, 167, 134, 145, 178, 156, 134, 189, 167, 145, 156, 178, 134, 167, 145, 189, 156, 178, 167, 145],
-                "teams": {
-                    "sales": {"messages": 4230, "efficiency_hours": 950, "cost": 18450},
-                    "dev": {"messages": 6180, "efficiency_hours": 1380, "cost": 19680},
-                    "marketing": {"messages": 2437, "efficiency_hours": 510, "cost": 7100}
-                }
-            }
-            self.send_json_response(usage_data)
-        elif parsed_path.path == '/api/dashboard/audit':
-            # 監査ログ
-            audit_logs = [
-                {
-                    "timestamp": "2024-01-15 14:35:22",
-                    "action": "ユーザー権限変更",
-                    "detail": "田中太郎の権限を管理者に変更",
-                    "user": "システム管理者"
-                },
-                {
-                    "timestamp": "2024-01-15 13:20:15", 
-                    "action": "新規チーム作成",
-                    "detail": "マーケティング部チームを作成",
-                    "user": "佐藤花子"
-                },
-                {
-                    "timestamp": "2024-01-15 11:45:08",
-                    "action": "セキュリティ設定変更", 
-                    "detail": "二要素認証を有効化",
-                    "user": "システム管理者"
-                }
-            ]
-            self.send_json_response(audit_logs)
+        # 固定レスポンスはエンコード済みのバイト列をそのまま返す
+        static_body = STATIC_ROUTES.get(path)
+        if static_body is not None:
+            self.send_json_bytes(static_body)
         else:
-            self.send_error(404, "Not Found")
+            self.dispatch(path, self._GET_ROUTES, self._NO_TEMPLATE_ROUTES)
 
     def do_POST(self):
         """POSTリクエスト処理"""
-        parsed_path = urlparse(self.path)
-        
-        if parsed_path.path == '/api/chat':
-            # チャットAPI（デモ応答）
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            
-            try:
-                request_data = json.loads(post_data.decode('utf-8'))
-                message = request_data.get('message', '')
-                model = request_data.get('model', 'gpt-3.5-turbo')
-                
-                print(f"💬 チャットリクエスト: {message[:50]}...")
-                
-                # 実際のOpenAI APIを最初に試す
-                ai_response = self.get_real_ai_response(message, model)
-                
-                if ai_response:
-                    print("✅ 実際のAI APIで応答")
-                    self.send_json_response(ai_response)
-                else:
-                    print("⚠️ デモモードで応答")
-                    # フォールバック：デモ用AI応答生成
-                    demo_response = self.generate_demo_response(message, model)
-                    
-                    response = {
-                        "content": demo_response,
-                        "model": model,
-                        "tokens_used": len(demo_response.split()) + len(message.split()),
-                        "processing_time_ms": 500,
-                        "finish_reason": "stop",
-                        "metadata": {
-                            "prompt_tokens": len(message.split()),
-                            "completion_tokens": len(demo_response.split()),
-                            "demo_mode": True,
-                            "timestamp": datetime.now().isoformat()
-                        }
-                    }
-                    
-                    self.send_json_response(response)
-                
-            except json.JSONDecodeError:
-                self.send_error(400, "Invalid JSON")
-        elif parsed_path.path == '/api/templates':
-            # テンプレート作成API
-            self.handle_create_template_request()
-        elif parsed_path.path.startswith('/api/templates/') and parsed_path.path.endswith('/use'):
-            # テンプレート使用API
-            self.handle_template_use_request(parsed_path)
-        elif parsed_path.path.startswith('/api/templates/'):
-            # 特定テンプレート操作
-            self.send_json_response({"message": "Template operation completed"})
-        else:
-            self.send_error(404, "Not Found")
+        self.dispatch(self.request_path(), self._POST_ROUTES, self._POST_TEMPLATE_ROUTES)
 
     def do_DELETE(self):
         """DELETEリクエスト処理"""
-        parsed_path = urlparse(self.path)
-        
-        if parsed_path.path.startswith('/api/templates/'):
-            # テンプレート削除API
-            self.handle_delete_template_request(parsed_path)
-        else:
-            self.send_error(404, "Not Found")
+        self.dispatch(self.request_path(), self._NO_ROUTES, self._DELETE_TEMPLATE_ROUTES)
 
     def do_PUT(self):
         """PUTリクエスト処理"""
-        parsed_path = urlparse(self.path)
+        self.dispatch(self.request_path(), self._NO_ROUTES, self._PUT_TEMPLATE_ROUTES)
+
+    def request_path(self):
+        """リクエストのパス部分（クエリ文字列を使わないため、urlparseせずに'?'以降を落とすだけ）"""
+        path = self.path
+        query_start = path.find('?')
+        return path if query_start < 0 else path[:query_start]
+
+    def dispatch(self, path, routes, template_routes):
+        """パスに対応するハンドラーを呼び出す（完全一致 → /api/templates/<id>[/<action>] の順）"""
+        handler = routes.get(path)
+        if handler is not None:
+            handler(self)
+            return
+        
+        match = _TEMPLATE_PATH_RE.fullmatch(path)
+        if match is not None:
+            handler = template_routes.get(match['action'])
+            if handler is not None:
+                handler(self, match['id'])
+                return
+        
+        self.discard_request_body()
+        self.send_error(404, "Not Found")
+
+    def handle_health_request(self):
+        """ヘルスチェック"""
+        self.send_json_bytes(get_health_json())
+
+    def handle_list_templates_request(self):
+        """テンプレート一覧リクエストを処理"""
+        logger.info("📝 テンプレート一覧取得リクエスト")
+        # アクティブなテンプレートを更新日時順で取得（変更がなければエンコード済みを再利用）
+        body, count = get_templates_list_json()
+        logger.info("📋 アクティブなテンプレート: %s件", count)
+        self.send_json_bytes(body)
+
+    def handle_chat_request(self):
+        """チャットリクエストを処理"""
+        request_data = self.read_json_body()
+        if request_data is None:
+            return
+        
+        message = request_data.get('message', '')
+        model = request_data.get('model', 'gpt-3.5-turbo')
+        
+        logger.info("💬 チャットリクエスト: %s...", message[:50])
         
-        if parsed_path.path.startswith('/api/templates/'):
-            # テンプレート更新API
-            self.handle_update_template_request(parsed_path)
+        # 実際のOpenAI APIを最初に試す
+        ai_response = self.get_real_ai_response(message, model)
+        
+        if ai_response:
+            logger.info("✅ 実際のAI APIで応答")
+            self.send_json_response(ai_response)
         else:
-            self.send_error(404, "Not Found")
+            logger.info("⚠️ デモモードで応答")
+            # フォールバック：デモ用AI応答生成
+            self.send_json_response(build_demo_chat_response(message, model))
+
+    def handle_template_operation_request(self, template_id):
+        """特定テンプレート操作"""
+        self.discard_request_body()
+        self.send_json_response({"message": "Template operation completed"})
 
     def get_real_ai_response(self, message, model):
         """実際のOpenAI APIを使用してAI応答を生成"""
@@ -266,221 +781,112 @@ class DemoAPIHandler(BaseHTTPRequestHandler):
             
             response = OPENAI_CLIENT.chat.completions.create(
                 model=model,
-                messages=[
-                    {"role": "system", "content": """あなたは日本語で応答する親切で知識豊富なAIアシスタントです。企業向けのセキュアなAIチャットシステムとして、専門的で有用な回答を提供してください。
-
-重要な注意事項：
-- ユーザーの質問に直接的に回答してください
-- 現在の日時、天気、リアルタイム情報については「申し訳ございませんが、リアルタイム情報にはアクセスできません」と正直に伝えてください
-- 分からないことは「分からない」と素直に答えてください
-- 質問の内容をしっかり理解してから回答してください
-- 曖昧な一般的な回答ではなく、具体的で役立つ情報を提供してください"""},
-                    {"role": "user", "content": message}
-                ],
+                messages=chat_messages(CHAT_SYSTEM_PROMPT, message),
                 temperature=0.3,
                 max_tokens=1000
             )
             
-            processing_time = int((time.time() - start_time) * 1000)
-            
-            return {
-                "content": response.choices[0].message.content,
-                "model": response.model,
-                "tokens_used": response.usage.total_tokens,
-                "processing_time_ms": processing_time,
-                "finish_reason": response.choices[0].finish_reason,
-                "metadata": {
-                    "prompt_tokens": response.usage.prompt_tokens,
-                    "completion_tokens": response.usage.completion_tokens,
-                    "real_ai": True,
-                    "timestamp": datetime.now().isoformat()
-                }
-            }
+            return format_ai_response(response, start_time)
             
         except Exception as e:
-            print(f"❌ OpenAI API Error: {e}")
+            logger.error("❌ OpenAI API Error: %s", e)
             return None
 
-    def handle_template_use_request(self, parsed_path):
+    def handle_template_use_request(self, template_id):
         """テンプレート使用リクエストを処理"""
         try:
-            # テンプレートIDを取得
-            template_id = parsed_path.path.split('/')[-2]
-            
             # リクエストボディを取得
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            request_data = json.loads(post_data.decode('utf-8'))
+            request_data = self.read_json_body()
+            if request_data is None:
+                return
             
             user_message = request_data.get('user_message', '')
             variables = request_data.get('variables', {})
             model = request_data.get('model', 'gpt-3.5-turbo')
             
-            print(f"📝 テンプレート使用: ID={template_id}, Message={user_message[:50]}...")
+            logger.info("📝 テンプレート使用: ID=%s, Message=%s...", template_id, user_message[:50])
             
-            # テンプレートを取得（デモ用の固定テンプレート）
-            template = self.get_demo_template(template_id)
+            # テンプレートを取得
+            template = get_active_template(template_id)
             if not template:
                 self.send_error(404, "Template not found")
                 return
             
-            # テンプレートのシステムプロンプトに変数を適用
-            system_prompt = template['content']
-            for var_name, var_value in variables.items():
-                placeholder = f"{{{{{var_name}}}}}"
-                system_prompt = system_prompt.replace(placeholder, var_value)
+            system_prompt = render_template_prompt(template, variables)
             
             # 実際のAI APIを使用してテンプレート応答を生成
             ai_response = self.get_template_ai_response(system_prompt, user_message, model)
             
             if ai_response:
-                print("✅ テンプレート + 実際のAI APIで応答")
+                logger.info("✅ テンプレート + 実際のAI APIで応答")
                 self.send_json_response(ai_response)
             else:
-                print("⚠️ テンプレート + デモモードで応答")
+                logger.info("⚠️ テンプレート + デモモードで応答")
                 # フォールバック：デモ応答
-                demo_response = f"""📝 **テンプレート適用結果** ({template['name']})
-
-**適用されたプロンプト:**
-{system_prompt}
-
-**ユーザーメッセージ:**
-{user_message}
-
-⚠️ **デモモード**: OpenAI APIキーが設定されていないため、デモ応答を表示しています。
-実際の運用では、ここに高品質なAI応答が表示されます。
-
-🔧 **設定方法**: .envファイルにOPENAI_API_KEYを設定してください。"""
-                
-                response = {
-                    "content": demo_response,
-                    "model": model,
-                    "tokens_used": len(demo_response.split()),
-                    "processing_time_ms": 300,
-                    "finish_reason": "stop",
-                    "metadata": {
-                        "template_id": template_id,
-                        "template_name": template['name'],
-                        "prompt_tokens": len(system_prompt.split()),
-                        "completion_tokens": len(demo_response.split()),
-                        "demo_mode": True,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                }
-                self.send_json_response(response)
+                self.send_json_response(
+                    build_template_demo_response(template, template_id, system_prompt, user_message, model)
+                )
                 
         except Exception as e:
-            print(f"❌ Template use error: {e}")
+            logger.error("❌ Template use error: %s", e)
             self.send_error(500, f"Template processing error: {str(e)}")
 
     def handle_create_template_request(self):
         """テンプレート作成リクエストを処理"""
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            request_data = json.loads(post_data.decode('utf-8'))
-            
-            # 新しいテンプレートIDを生成
-            template_id = str(uuid.uuid4())
-            
-            # テンプレートデータを作成
-            template = {
-                "id": template_id,
-                "name": request_data.get('name', ''),
-                "description": request_data.get('description', ''),
-                "category": request_data.get('category', ''),
-                "system_prompt": request_data.get('system_prompt', ''),
-                "variables": request_data.get('variables', []),
-                "example_input": request_data.get('example_input', ''),
-                "example_output": request_data.get('example_output', ''),
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
-                "is_active": True
-            }
-            
-            # ストレージに保存
-            templates_storage[template_id] = template
+            request_data = self.read_json_body()
+            if request_data is None:
+                return
             
-            print(f"✅ テンプレート作成: {template['name']} (ID: {template_id})")
+            template = create_template(request_data)
             self.send_json_response({
                 "message": "Template created successfully",
-                "id": template_id,
+                "id": template["id"],
                 "template": template
             })
             
         except Exception as e:
-            print(f"❌ テンプレート作成エラー: {e}")
+            logger.error("❌ テンプレート作成エラー: %s", e)
             self.send_error(500, f"Template creation error: {str(e)}")
 
-    def handle_update_template_request(self, parsed_path):
+    def handle_update_template_request(self, template_id):
         """テンプレート更新リクエストを処理"""
         try:
-            template_id = parsed_path.path.split('/')[-1]
+            request_data = self.read_json_body()
+            if request_data is None:
+                return
             
-            if template_id not in templates_storage:
+            template = update_template(template_id, request_data)
+            if template is None:
                 self.send_error(404, "Template not found")
                 return
             
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            request_data = json.loads(post_data.decode('utf-8'))
-            
-            # 既存テンプレートを更新
-            template = templates_storage[template_id]
-            template.update({
-                "name": request_data.get('name', template['name']),
-                "description": request_data.get('description', template['description']),
-                "category": request_data.get('category', template['category']),
-                "system_prompt": request_data.get('system_prompt', template['system_prompt']),
-                "variables": request_data.get('variables', template['variables']),
-                "example_input": request_data.get('example_input', template['example_input']),
-                "example_output": request_data.get('example_output', template['example_output']),
-                "updated_at": datetime.now().isoformat()
-            })
-            
-            print(f"✅ テンプレート更新: {template['name']} (ID: {template_id})")
             self.send_json_response({
                 "message": "Template updated successfully",
                 "template": template
             })
             
         except Exception as e:
-            print(f"❌ テンプレート更新エラー: {e}")
+            logger.error("❌ テンプレート更新エラー: %s", e)
             self.send_error(500, f"Template update error: {str(e)}")
 
-    def handle_delete_template_request(self, parsed_path):
+    def handle_delete_template_request(self, template_id):
         """テンプレート削除リクエストを処理"""
         try:
-            template_id = parsed_path.path.split('/')[-1]
+            self.discard_request_body()
             
-            if template_id not in templates_storage:
+            if not delete_template(template_id):
                 self.send_error(404, "Template not found")
                 return
             
-            # 論理削除（is_activeをFalseに設定）
-            template = templates_storage[template_id]
-            template['is_active'] = False
-            template['updated_at'] = datetime.now().isoformat()
-            
-            print(f"✅ テンプレート削除: {template['name']} (ID: {template_id})")
             self.send_json_response({
                 "message": "Template deleted successfully"
             })
             
         except Exception as e:
-            print(f"❌ テンプレート削除エラー: {e}")
+            logger.error("❌ テンプレート削除エラー: %s", e)
             self.send_error(500, f"Template deletion error: {str(e)}")
 
-    def get_demo_template(self, template_id):
-        """ストレージからテンプレートを取得"""
-        template = templates_storage.get(template_id)
-        if template and template.get('is_active', True):
-            return {
-                "name": template['name'],
-                "content": template['system_prompt']
-            }
-        return None
-
     def get_template_ai_response(self, system_prompt, user_message, model):
         """テンプレートを使用したAI応答を生成"""
         if not OPENAI_AVAILABLE or not OPENAI_CLIENT:
@@ -491,148 +897,416 @@ class DemoAPIHandler(BaseHTTPRequestHandler):
             
             response = OPENAI_CLIENT.chat.completions.create(
                 model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
+                messages=chat_messages(system_prompt, user_message),
                 temperature=0.7,
                 max_tokens=1000
             )
             
-            processing_time = int((time.time() - start_time) * 1000)
-            
-            return {
-                "content": response.choices[0].message.content,
-                "model": response.model,
-                "tokens_used": response.usage.total_tokens,
-                "processing_time_ms": processing_time,
-                "finish_reason": response.choices[0].finish_reason,
-                "metadata": {
-                    "prompt_tokens": response.usage.prompt_tokens,
-                    "completion_tokens": response.usage.completion_tokens,
-                    "template_used": True,
-                    "real_ai": True,
-                    "timestamp": datetime.now().isoformat()
-                }
-            }
+            return format_ai_response(response, start_time, template_used=True)
             
         except Exception as e:
-            print(f"❌ Template OpenAI API Error: {e}")
+            logger.error("❌ Template OpenAI API Error: %s", e)
             return None
 
-    def generate_demo_response(self, message, model):
-        """デモ用のAI応答を生成"""
-        # キーワードベースの応答生成
-        message_lower = message.lower()
+    def read_json_body(self, max_bytes=MAX_REQUEST_BODY_BYTES):
+        """リクエストボディをJSONオブジェクトとして読み込む（不正な場合はエラー応答を送信してNoneを返す）"""
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            self.send_error(400, "Invalid Content-Length")
+            return None
+        if content_length > max_bytes:
+            # 読み残したボディが次のリクエストとして解釈されないよう接続を閉じる
+            self.close_connection = True
+            self.send_error(413, "Request body too large")
+            return None
         
-        if 'プロジェクト' in message:
-            return f"""📊 **プロジェクト管理について** ({model}で分析)
+        try:
+            return decode_json_object(self.rfile.read(content_length))
+        except ValueError:
+            self.send_error(400, "Invalid JSON")
+            return None
 
-**効果的なプロジェクト管理のポイント：**
+    def discard_request_body(self, max_bytes=MAX_REQUEST_BODY_BYTES):
+        """使わないリクエストボディを読み捨てる（keep-alive接続で次のリクエストとして解釈されないようにする）"""
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            content_length = -1
+        if 0 <= content_length <= max_bytes:
+            self.rfile.read(content_length)
+        else:
+            self.close_connection = True
 
-✅ **計画フェーズ**
-- 明確な目標設定と成功指標の定義
-- リスク分析と対策の事前準備
-- 適切なチーム編成とロール分担
+    def send_json_response(self, data):
+        """JSON応答を送信"""
+        self.send_json_bytes(encode_json(data))
 
-✅ **実行フェーズ**  
-- 定期的な進捗確認とコミュニケーション
-- 問題の早期発見と迅速な対応
-- 品質管理と継続的改善
+    def send_json_bytes(self, body):
+        """エンコード済みのJSON応答を送信（ステータス行・ヘッダー・本文を1回の書き込みで送る）"""
+        self.log_request(200)
+        self.wfile.write(b"".join((
+            _JSON_RESPONSE_HEAD,
+            str(len(body)).encode('ascii'),
+            b"\r\n\r\n",
+            body
+        )))
 
-✅ **ツール活用**
-- ガントチャートでスケジュール管理
-- カンバンボードでタスク可視化
-- 定期的なレトロスペクティブ
+    def log_message(self, format, *args):
+        """ログメッセージを制御"""
+        # 秒単位でキャッシュしたタイムスタンプの時刻部分（HH:MM:SS）を再利用
+        logger.info("[%s] " + format, now_iso()[11:19], *args)
 
-ご不明な点があれば、具体的な状況をお聞かせください！"""
-        
-        elif 'セキュリティ' in message:
-            return f"""🔒 **セキュリティ対策について** ({model}で分析)
+    # メソッドごとのルーティングテーブル
+    # 完全一致のパス -> ハンドラー
+    _NO_ROUTES = {}
+    _GET_ROUTES = {
+        '/health': handle_health_request,
+        '/api/templates': handle_list_templates_request,
+    }
+    _POST_ROUTES = {
+        '/api/chat': handle_chat_request,
+        '/api/templates': handle_create_template_request,
+    }
+    # /api/templates/<id>[/<action>] のアクション（なしはNone） -> ハンドラー(self, template_id)
+    _NO_TEMPLATE_ROUTES = {}
+    _POST_TEMPLATE_ROUTES = {
+        'use': handle_template_use_request,
+        None: handle_template_operation_request,
+    }
+    _PUT_TEMPLATE_ROUTES = {None: handle_update_template_request}
+    _DELETE_TEMPLATE_ROUTES = {None: handle_delete_template_request}
 
-**企業セキュリティの重要ポイント：**
+# ===== ASGI版（FastAPI + uvicorn） =====
+# OpenAI呼び出しをAsyncOpenAIでawaitし、応答待ちの間もイベントループで他のリクエストを処理する。
+# テンプレート操作は同期関数（await を挟まない）のため、イベントループ上では追加のロックなしで原子的に実行される。
+if ASGI_AVAILABLE:
+    @asynccontextmanager
+    async def lifespan(app):
+        """ワーカープロセスごとにログ出力・AsyncOpenAIクライアント・デモテンプレートを用意"""
+        setup_logging()
+        app.state.openai_client = None
+        if OPENAI_AVAILABLE and AsyncOpenAI is not None:
+            app.state.openai_client = AsyncOpenAI(
+                api_key=os.getenv('OPENAI_API_KEY'),
+                http_client=httpx.AsyncClient(
+                    http2=OPENAI_HTTP2, limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT
+                )
+            )
+        initialize_demo_templates()
+        try:
+            yield
+        finally:
+            if app.state.openai_client is not None:
+                await app.state.openai_client.close()
+            stop_logging()
 
-🛡️ **技術的対策**
-- 多要素認証（MFA）の導入
-- エンドポイント保護
-- ネットワークセグメンテーション
-- 定期的な脆弱性スキャン
+    app = FastAPI(
+        title="Secure AI Chat Demo API",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse if orjson is not None else JSONResponse
+    )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        allow_headers=["Content-Type", "Authorization"],
+    )
 
-👥 **人的セキュリティ**
-- 従業員向けセキュリティ教育
-- アクセス権限の適切な管理
-- インシデント対応手順の整備
+    def json_bytes_response(body):
+        """エンコード済みのJSONをそのまま返す"""
+        return Response(content=body, media_type="application/json; charset=utf-8")
 
-📋 **コンプライアンス**
-- GDPR、個人情報保護法への対応
-- セキュリティポリシーの策定
-- 定期的な監査とレビュー
+    async def read_json_body(request):
+        """リクエストボディをJSONオブジェクトとして読み込む"""
+        try:
+            content_length = int(request.headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length")
+        if content_length > MAX_REQUEST_BODY_BYTES:
+            raise HTTPException(status_code=413, detail="Request body too large")
+        
+        try:
+            return decode_json_object(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON")
 
-具体的なセキュリティ要件についてお聞かせください！"""
+    async def get_real_ai_response_async(client, message, model):
+        """AsyncOpenAIを使用してAI応答を生成"""
+        if client is None:
+            return None
+        
+        try:
+            start_time = time.time()
+            
+            response = await client.chat.completions.create(
+                model=model,
+                messages=chat_messages(CHAT_SYSTEM_PROMPT, message),
+                temperature=0.3,
+                max_tokens=1000
+            )
+            
+            return format_ai_response(response, start_time)
+            
+        except Exception as e:
+            logger.error("❌ OpenAI API Error: %s", e)
+            return None
+
+    async def get_template_ai_response_async(client, system_prompt, user_message, model):
+        """AsyncOpenAIを使用してテンプレート応答を生成"""
+        if client is None:
+            return None
         
-        elif '技術' in message or '導入' in message:
-            return f"""💡 **新技術導入について** ({model}で分析)
+        try:
+            start_time = time.time()
+            
+            response = await client.chat.completions.create(
+                model=model,
+                messages=chat_messages(system_prompt, user_message),
+                temperature=0.7,
+                max_tokens=1000
+            )
+            
+            return format_ai_response(response, start_time, template_used=True)
+            
+        except Exception as e:
+            logger.error("❌ Template OpenAI API Error: %s", e)
+            return None
 
-**技術導入の成功要因：**
+    def sse_event(data):
+        """SSEのdataイベントを1件エンコード"""
+        return b"data: " + encode_json(data) + b"\n\n"
 
-🎯 **戦略的アプローチ**
-- ビジネス目標との整合性確認
-- ROI（投資対効果）の明確化
-- 段階的な導入計画
+    async def open_ai_stream(client, messages, model, temperature):
+        """AsyncOpenAIのストリーミング応答を開始（利用できない・失敗した場合はNone）"""
+        if client is None:
+            return None
+        
+        try:
+            return await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=1000,
+                stream=True
+            )
+        except Exception as e:
+            logger.error("❌ OpenAI API Error: %s", e)
+            return None
 
-🔧 **技術選定**
-- 既存システムとの互換性
-- スケーラビリティと将来性
-- サポート体制とコミュニティ
+    async def ai_event_stream(stream, model):
+        """OpenAIのストリームをSSEイベントに変換（チャンク数を出力トークン数の目安として数える）"""
+        completion_tokens = 0
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    completion_tokens += 1
+                    yield sse_event({"delta": choice.delta.content})
+                if choice.finish_reason:
+                    yield sse_event({
+                        "finish_reason": choice.finish_reason,
+                        "model": model,
+                        "completion_tokens": completion_tokens,
+                        "real_ai": True
+                    })
+        except Exception as e:
+            # ヘッダー送信後のためステータスは変更できない。エラーイベントとして通知する
+            logger.error("❌ OpenAI API Stream Error: %s", e)
+            yield sse_event({"error": str(e)})
+        yield b"data: [DONE]\n\n"
 
-👨‍💼 **組織的準備**
-- チームのスキルアップ計画
-- 変更管理プロセス
-- ステークホルダーとの合意形成
+    async def demo_event_stream(demo_response):
+        """デモ応答を1件のSSEイベントとして返す"""
+        yield sse_event({"delta": demo_response["content"]})
+        yield sse_event({
+            "finish_reason": demo_response["finish_reason"],
+            "model": demo_response["model"],
+            "completion_tokens": demo_response["metadata"]["completion_tokens"],
+            "demo_mode": True
+        })
+        yield b"data: [DONE]\n\n"
 
-どのような技術分野での導入をご検討でしょうか？"""
+    def event_stream_response(events):
+        return StreamingResponse(
+            events,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    def _static_endpoint(body):
+        async def endpoint():
+            return json_bytes_response(body)
+        return endpoint
+
+    # 固定レスポンスはエンコード済みのバイト列をそのまま返す
+    for _path, _body in STATIC_ROUTES.items():
+        app.add_api_route(_path, _static_endpoint(_body), methods=["GET"])
+
+    @app.get("/health")
+    async def health():
+        return json_bytes_response(get_health_json())
+
+    @app.get("/api/templates")
+    async def list_templates():
+        body, count = get_templates_list_json()
+        logger.info("📋 アクティブなテンプレート: %s件", count)
+        return json_bytes_response(body)
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        request_data = await read_json_body(request)
+        message = request_data.get('message', '')
+        model = request_data.get('model', 'gpt-3.5-turbo')
         
-        else:
-            return f"""🤖 **AI アシスタント** ({model}で応答)
+        logger.info("💬 チャットリクエスト: %s...", message[:50])
+        
+        ai_response = await get_real_ai_response_async(request.app.state.openai_client, message, model)
+        if ai_response:
+            logger.info("✅ 実際のAI APIで応答")
+            return ai_response
+        
+        logger.info("⚠️ デモモードで応答")
+        return build_demo_chat_response(message, model)
 
-ご質問ありがとうございます！
+    @app.post("/api/chat/stream")
+    async def chat_stream(request: Request):
+        """チャットAPI（SSE）: 生成されたトークンを順次送信する"""
+        request_data = await read_json_body(request)
+        message = request_data.get('message', '')
+        model = request_data.get('model', 'gpt-3.5-turbo')
+        
+        logger.info("💬 チャットリクエスト（ストリーミング）: %s...", message[:50])
+        
+        stream = await open_ai_stream(
+            request.app.state.openai_client,
+            chat_messages(CHAT_SYSTEM_PROMPT, message),
+            model,
+            temperature=0.3
+        )
+        if stream is not None:
+            return event_stream_response(ai_event_stream(stream, model))
+        
+        logger.info("⚠️ デモモードで応答")
+        return event_stream_response(demo_event_stream(build_demo_chat_response(message, model)))
 
-**このAIチャットシステムの特徴：**
-- 🔐 セキュアな企業向け通信
-- 🚀 リアルタイム応答
-- 📝 カスタムテンプレート対応
-- 👥 マルチテナント管理
+    @app.post("/api/templates")
+    async def create_template_endpoint(request: Request):
+        template = create_template(await read_json_body(request))
+        return {
+            "message": "Template created successfully",
+            "id": template["id"],
+            "template": template
+        }
 
-何か具体的なご質問やご相談があれば、お気軽にお聞かせください。
+    @app.post("/api/templates/{template_id}/use")
+    async def use_template(template_id: str, request: Request):
+        request_data = await read_json_body(request)
+        user_message = request_data.get('user_message', '')
+        variables = request_data.get('variables', {})
+        model = request_data.get('model', 'gpt-3.5-turbo')
+        
+        logger.info("📝 テンプレート使用: ID=%s, Message=%s...", template_id, user_message[:50])
+        
+        template = get_active_template(template_id)
+        if not template:
+            raise HTTPException(status_code=404, detail="Template not found")
+        
+        system_prompt = render_template_prompt(template, variables)
+        
+        ai_response = await get_template_ai_response_async(
+            request.app.state.openai_client, system_prompt, user_message, model
+        )
+        if ai_response:
+            logger.info("✅ テンプレート + 実際のAI APIで応答")
+            return ai_response
+        
+        logger.info("⚠️ テンプレート + デモモードで応答")
+        return build_template_demo_response(template, template_id, system_prompt, user_message, model)
 
-**例：**
-- プロジェクト管理について
-- セキュリティ対策について  
-- 新技術導入について
+    @app.post("/api/templates/{template_id}/use/stream")
+    async def use_template_stream(template_id: str, request: Request):
+        """テンプレート使用API（SSE）"""
+        request_data = await read_json_body(request)
+        user_message = request_data.get('user_message', '')
+        variables = request_data.get('variables', {})
+        model = request_data.get('model', 'gpt-3.5-turbo')
+        
+        template = get_active_template(template_id)
+        if not template:
+            raise HTTPException(status_code=404, detail="Template not found")
+        
+        system_prompt = render_template_prompt(template, variables)
+        
+        stream = await open_ai_stream(
+            request.app.state.openai_client,
+            chat_messages(system_prompt, user_message),
+            model,
+            temperature=0.7
+        )
+        if stream is not None:
+            return event_stream_response(ai_event_stream(stream, model))
+        
+        logger.info("⚠️ テンプレート + デモモードで応答")
+        return event_stream_response(demo_event_stream(
+            build_template_demo_response(template, template_id, system_prompt, user_message, model)
+        ))
 
-より詳しくサポートいたします！"""
+    @app.post("/api/templates/{template_id}")
+    async def template_operation(template_id: str):
+        return {"message": "Template operation completed"}
 
-    def send_json_response(self, data):
-        """JSON応答を送信"""
-        response = json.dumps(data, ensure_ascii=False, indent=2)
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json; charset=utf-8')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(response.encode('utf-8'))
+    @app.put("/api/templates/{template_id}")
+    async def update_template_endpoint(template_id: str, request: Request):
+        template = update_template(template_id, await read_json_body(request))
+        if template is None:
+            raise HTTPException(status_code=404, detail="Template not found")
+        return {
+            "message": "Template updated successfully",
+            "template": template
+        }
 
-    def log_message(self, format, *args):
-        """ログメッセージを制御"""
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] {format % args}")
+    @app.delete("/api/templates/{template_id}")
+    async def delete_template_endpoint(template_id: str):
+        if not delete_template(template_id):
+            raise HTTPException(status_code=404, detail="Template not found")
+        return {"message": "Template deleted successfully"}
+
+class ReusePortHTTPServer(ThreadingHTTPServer):
+    """SO_REUSEPORTで複数プロセスが同じポートを待ち受けるサーバー（カーネルが接続を振り分ける）"""
+
+    def server_bind(self):
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
 
 def start_demo_server():
     """デモサーバーを開始"""
+    # DEMO_API_PROCESSES > 1 の場合、同じポートで待ち受けるプロセスをフォークする
+    # （テンプレートはsqlite経由で各プロセスに共有される）
+    processes = int(os.getenv('DEMO_API_PROCESSES', '1'))
+    if processes > 1 and not hasattr(socket, 'SO_REUSEPORT'):
+        print("⚠️ SO_REUSEPORTが利用できないため、1プロセスで起動します")
+        processes = 1
+    for _ in range(processes - 1):
+        if os.fork() == 0:
+            break
+    
+    # ログ出力スレッドはフォークで引き継がれないため、各プロセスで開始する
+    setup_logging()
     # デモテンプレートを初期化
     initialize_demo_templates()
     
     server_address = ('localhost', 8000)
-    httpd = HTTPServer(server_address, DemoAPIHandler)
-    print("🚀 デモ用APIサーバー起動中...")
+    server_class = ReusePortHTTPServer if processes > 1 else ThreadingHTTPServer
+    # リクエストごとにスレッドで処理し、OpenAI応答待ちの間も他のクライアントを処理する
+    httpd = server_class(server_address, DemoAPIHandler)
+    # keep-alive中の接続スレッドがサーバー停止を妨げないようにする
+    httpd.daemon_threads = True
+    print(f"🚀 デモ用APIサーバー起動中... (PID {os.getpid()})")
     print("📍 URL: http://localhost:8000")
     print("🔧 ヘルスチェック: http://localhost:8000/health")
     print("💬 チャットAPI: http://localhost:8000/api/chat")
@@ -646,6 +1320,33 @@ def start_demo_server():
     except KeyboardInterrupt:
         print("\n🛑 サーバーを停止しています...")
         httpd.shutdown()
+        if OPENAI_CLIENT is not None:
+            OPENAI_CLIENT.close()
+        stop_logging()
+
+def start_asgi_server():
+    """ASGI版デモサーバーをuvicornで開始（uvloop/httptoolsがあれば自動で使用）"""
+    if not ASGI_AVAILABLE:
+        print("❌ FastAPIが見つかりません。pip install fastapi uvicorn[standard] を実行してください。")
+        sys.exit(1)
+    
+    import uvicorn
+    
+    # テンプレートはsqlite経由で各ワーカーに共有される
+    workers = int(os.getenv('DEMO_API_WORKERS', '1'))
+    print(f"🚀 デモ用APIサーバー（ASGI, workers={workers}）起動中...")
+    print("📍 URL: http://localhost:8000")
+    print("=" * 50)
+    uvicorn.run(
+        "demo_api:app",
+        host="localhost",
+        port=8000,
+        workers=workers,
+        app_dir=os.path.dirname(os.path.abspath(__file__))
+    )
 
 if __name__ == '__main__':
-    start_demo_server()
\ No newline at end of file
+    if '--asgi' in sys.argv[1:]:
+        start_asgi_server()
+    else:
+        start_demo_server()
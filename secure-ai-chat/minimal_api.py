@@ -2,108 +2,195 @@
 """
 Minimal API server for demo - no external dependencies
 Provides basic endpoints that the frontend expects
+
+Runs on aiohttp.web (with uvloop if installed) when aiohttp is available,
+otherwise falls back to the stdlib http.server implementation.
 """
 
+import asyncio
+import bisect
+import functools
 import json
+import re
+import threading
 import time
 import uuid
 import os
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse
 from datetime import datetime
 
+try:
+    from aiohttp import web
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Faster JSON encoding when orjson is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # インメモリーテンプレートストレージ
 templates_storage = {}
+# Active templates kept sorted by updated_at (ascending; ties newest-stored first)
+_active_templates_sorted = []
+# Bumped on every templates_storage mutation to invalidate the cached list JSON
+_templates_version = 0
+_templates_json_cache = (-1, b'')
+# Guards the template state above (the stdlib server handles requests in threads)
+_templates_lock = threading.RLock()
 
-class MinimalAPIHandler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        """CORS preflight"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
+# Available models
+MODELS = [
+    {"id": "gpt-3.5-turbo", "name": "GPT-3.5 Turbo", "description": "Fast and efficient", "max_tokens": 4096, "cost_per_1k_tokens": 0.002},
+    {"id": "gpt-4", "name": "GPT-4", "description": "Most capable", "max_tokens": 8192, "cost_per_1k_tokens": 0.03},
+    {"id": "gpt-4o", "name": "GPT-4o", "description": "Optimized for speed", "max_tokens": 4096, "cost_per_1k_tokens": 0.005}
+]
 
-    def do_GET(self):
-        """GET requests"""
-        parsed_path = urlparse(self.path)
-        
-        if parsed_path.path == '/health':
-            self.send_json_response({"status": "healthy", "timestamp": datetime.now().isoformat()})
-        elif parsed_path.path in ['/api/templates', '/api/v1/templates']:
-            # Return stored templates or demo templates if storage is empty
-            if not templates_storage:
-                # Initialize with demo templates
-                self.initialize_demo_templates()
-            
-            # Return all active templates
-            templates = [t for t in templates_storage.values() if t.get('is_active', True)]
-            templates.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
-            self.send_json_response(templates)
-        elif parsed_path.path in ['/api/models', '/api/v1/models']:
-            # Return available models
-            models = [
-                {"id": "gpt-3.5-turbo", "name": "GPT-3.5 Turbo", "description": "Fast and efficient", "max_tokens": 4096, "cost_per_1k_tokens": 0.002},
-                {"id": "gpt-4", "name": "GPT-4", "description": "Most capable", "max_tokens": 8192, "cost_per_1k_tokens": 0.03},
-                {"id": "gpt-4o", "name": "GPT-4o", "description": "Optimized for speed", "max_tokens": 4096, "cost_per_1k_tokens": 0.005}
-            ]
-            self.send_json_response(models)
-        else:
-            self.send_error(404, "Not Found")
+def encode_json(data):
+    """Serialize a response payload to compact UTF-8 JSON bytes (orjson if available)"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
 
-    def do_POST(self):
-        """POST requests"""
-        parsed_path = urlparse(self.path)
-        
-        if parsed_path.path in ['/api/chat', '/api/v1/ai/chat']:
-            # Chat endpoint - return demo response
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            
-            try:
-                request_data = json.loads(post_data.decode('utf-8'))
-                message = request_data.get('message', '')
-                if 'messages' in request_data:
-                    # Handle messages array format
-                    messages = request_data['messages']
-                    if messages:
-                        message = messages[-1].get('content', '')
-                
-                model = request_data.get('model', 'gpt-3.5-turbo')
-                
-                # Generate demo response
-                demo_response = self.generate_demo_response(message, model)
-                
-                response = {
-                    "content": demo_response,
-                    "model": model,
-                    "tokens_used": len(demo_response.split()) + len(message.split()),
-                    "processing_time_ms": 500,
-                    "finish_reason": "stop",
-                    "metadata": {
-                        "prompt_tokens": len(message.split()),
-                        "completion_tokens": len(demo_response.split()),
-                        "demo_mode": True,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                }
-                
-                self.send_json_response(response)
-                
-            except json.JSONDecodeError:
-                self.send_error(400, "Invalid JSON")
-        elif parsed_path.path in ['/api/templates', '/api/v1/templates']:
-            # Template creation endpoint
-            self.handle_create_template()
-        else:
-            self.send_error(404, "Not Found")
+def decode_json_object(raw):
+    """Decode a request body (bytes) as a JSON object; an empty body is {} (ValueError if invalid)"""
+    if not raw:
+        return {}
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError("JSON body must be an object")
+    return data
 
-    def generate_demo_response(self, message, model):
-        """Generate a demo AI response"""
-        message_lower = message.lower()
+# Static payloads serialized once at import time
+MODELS_JSON_BYTES = encode_json(MODELS)
+HEALTH_TEMPLATE = b'{"status":"healthy","timestamp":"%s"}'
+HEALTH_CACHE_SECONDS = 1.0
+# (monotonic expiry, JSON bytes) - a liveness probe does not need a fresher timestamp
+_health_cache = (0.0, b'')
+
+# CORS headers
+CORS_ALLOW_ORIGIN = {'Access-Control-Allow-Origin': '*'}
+CORS_PREFLIGHT_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+}
+
+def get_health_json():
+    """Health check payload as JSON bytes (re-rendered at most once per HEALTH_CACHE_SECONDS)"""
+    global _health_cache
+    expires_at, payload = _health_cache
+    now = time.monotonic()
+    if now >= expires_at:
+        payload = HEALTH_TEMPLATE % datetime.now().isoformat().encode('ascii')
+        _health_cache = (now + HEALTH_CACHE_SECONDS, payload)
+    return payload
+
+def _template_sort_key(template):
+    return template.get('updated_at', '')
+
+def store_template(template):
+    """Add or replace a template and keep the sorted active index up to date"""
+    global _templates_version
+    with _templates_lock:
+        previous = templates_storage.get(template["id"])
+        if previous is not None:
+            for i, stored in enumerate(_active_templates_sorted):
+                if stored is previous:
+                    del _active_templates_sorted[i]
+                    break
+        templates_storage[template["id"]] = template
+        if template.get('is_active', True):
+            bisect.insort_left(_active_templates_sorted, template, key=_template_sort_key)
+        _templates_version += 1
+
+def list_active_templates():
+    """Return stored templates or demo templates if storage is empty"""
+    with _templates_lock:
+        if not templates_storage:
+            # Initialize with demo templates
+            initialize_demo_templates()
         
-        if any(word in message_lower for word in ['プロジェクト', 'project']):
-            return f"""📊 **プロジェクト管理について** ({model}で分析)
+        # Return all active templates, most recently updated first
+        return _active_templates_sorted[::-1]
+
+def get_templates_json():
+    """Active templates as JSON bytes, re-encoded only after storage changes"""
+    global _templates_json_cache
+    with _templates_lock:
+        if not templates_storage:
+            initialize_demo_templates()
+        version, payload = _templates_json_cache
+        if version != _templates_version:
+            payload = encode_json(list_active_templates())
+            _templates_json_cache = (_templates_version, payload)
+        return payload
+
+def build_chat_response(request_data):
+    """Build the demo chat response for a chat request body"""
+    message = request_data.get('message', '')
+    # Handle messages array format
+    messages = request_data.get('messages')
+    if messages:
+        message = messages[-1].get('content', '')
+    
+    model = request_data.get('model', 'gpt-3.5-turbo')
+    
+    # Generate demo response
+    demo_response, completion_tokens = generate_demo_response(message, model)
+    prompt_tokens = approx_tokens(message)
+    
+    return {
+        "content": demo_response,
+        "model": model,
+        "tokens_used": prompt_tokens + completion_tokens,
+        "processing_time_ms": 500,
+        "finish_reason": "stop",
+        "metadata": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "demo_mode": True,
+            "timestamp": datetime.now().isoformat()
+        }
+    }
+
+def create_template(request_data):
+    """Create and store a template"""
+    # Generate new template ID
+    template_id = str(uuid.uuid4())
+    now = datetime.now().isoformat()
+    
+    # Create new template
+    template = {
+        "id": template_id,
+        "name": request_data.get('name', ''),
+        "description": request_data.get('description', ''),
+        "category": request_data.get('category', ''),
+        "system_prompt": request_data.get('system_prompt', ''),
+        "variables": request_data.get('variables', []),
+        "example_input": request_data.get('example_input', ''),
+        "example_output": request_data.get('example_output', ''),
+        "created_at": now,
+        "updated_at": now,
+        "is_active": True
+    }
+    
+    # Store template
+    store_template(template)
+    
+    print(f"✅ テンプレート作成: {template['name']} (ID: {template_id})")
+    
+    return {
+        "message": "Template created successfully",
+        "id": template_id,
+        "template": template
+    }
+
+# Demo response bodies ({model} is filled in per request)
+_PROJECT_RESPONSE = """📊 **プロジェクト管理について** ({model}で分析)
 
 **効果的なプロジェクト管理のポイント：**
 
@@ -124,8 +211,7 @@ class MinimalAPIHandler(BaseHTTPRequestHandler):
 
 ご不明な点があれば、具体的な状況をお聞かせください！"""
 
-        elif any(word in message_lower for word in ['セキュリティ', 'security']):
-            return f"""🔒 **セキュリティ対策について** ({model}で分析)
+_SECURITY_RESPONSE = """🔒 **セキュリティ対策について** ({model}で分析)
 
 **企業セキュリティの重要ポイント：**
 
@@ -147,8 +233,7 @@ class MinimalAPIHandler(BaseHTTPRequestHandler):
 
 具体的なセキュリティ要件についてお聞かせください！"""
 
-        else:
-            return f"""🤖 **AI アシスタント** ({model}で応答)
+_DEFAULT_RESPONSE = """🤖 **AI アシスタント** ({model}で応答)
 
 ご質問ありがとうございます！
 
@@ -167,110 +252,247 @@ class MinimalAPIHandler(BaseHTTPRequestHandler):
 
 より詳しくサポートいたします！"""
 
-    def initialize_demo_templates(self):
-        """Initialize demo templates"""
-        demo_templates = [
-            {
-                "id": "1",
-                "name": "📧 ビジネスメール作成",
-                "description": "丁寧で効果的なビジネスメールを自動生成",
-                "category": "ビジネス",
-                "system_prompt": "丁寧なビジネスメールを作成してください。件名: {subject}, 宛先: {recipient}, 内容: {content}",
-                "variables": [
-                    {"name": "subject", "description": "件名", "type": "text", "required": True},
-                    {"name": "recipient", "description": "宛先", "type": "text", "required": True},
-                    {"name": "content", "description": "メイン内容", "type": "textarea", "required": True}
-                ],
-                "example_input": "明日の会議について連絡したい",
-                "example_output": "件名: 会議について\\n\\n田中様\\n\\nいつもお世話になっております...",
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
-                "is_active": True
-            },
-            {
-                "id": "2",
-                "name": "🔍 コードレビュー",
-                "description": "コードを分析して改善点を提案",
-                "category": "開発",
-                "system_prompt": "{language}言語のコードをレビューし、{focus}の観点から改善点を提案してください。",
-                "variables": [
-                    {"name": "language", "description": "プログラミング言語", "type": "text", "required": True},
-                    {"name": "focus", "description": "レビュー観点", "type": "select", "options": ["セキュリティ", "パフォーマンス", "可読性", "全般"], "required": True}
-                ],
-                "example_input": "このPython関数をレビューしてください",
-                "example_output": "コードレビュー結果:\\n\\n良い点:\\n- 関数名が明確...",
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
-                "is_active": True
-            }
-        ]
+# Keyword -> demo response (definition order is the priority order)
+_DEMO_RESPONSES = {
+    'プロジェクト': _PROJECT_RESPONSE,
+    'project': _PROJECT_RESPONSE,
+    'セキュリティ': _SECURITY_RESPONSE,
+    'security': _SECURITY_RESPONSE,
+}
+_DEMO_KEYWORD_RE = re.compile("|".join(map(re.escape, _DEMO_RESPONSES)), re.IGNORECASE)
+
+def approx_tokens(text):
+    """Approximate whitespace-separated word count (counts separators instead of building a split() list)"""
+    if not text:
+        return 0
+    return text.count(' ') + text.count('\n') + 1
+
+@functools.lru_cache(maxsize=32)
+def render_demo_response(template, model):
+    """Fill in the model name and count its words (only a handful of models, so this is nearly always a cache hit)"""
+    content = template.format(model=model)
+    return content, approx_tokens(content)
+
+def generate_demo_response(message, model):
+    """Generate a demo AI response (returns the response and its word count)"""
+    # Scan the message once, then pick the highest-priority keyword found
+    found = {keyword.lower() for keyword in _DEMO_KEYWORD_RE.findall(message)}
+    template = next(
+        (response for keyword, response in _DEMO_RESPONSES.items() if keyword in found),
+        _DEFAULT_RESPONSE
+    )
+    return render_demo_response(template, model)
+
+def initialize_demo_templates():
+    """Initialize demo templates"""
+    now = datetime.now().isoformat()
+    demo_templates = [
+        {
+            "id": "1",
+            "name": "📧 ビジネスメール作成",
+            "description": "丁寧で効果的なビジネスメールを自動生成",
+            "category": "ビジネス",
+            "system_prompt": "丁寧なビジネスメールを作成してください。件名: {subject}, 宛先: {recipient}, 内容: {content}",
+            "variables": [
+                {"name": "subject", "description": "件名", "type": "text", "required": True},
+                {"name": "recipient", "description": "宛先", "type": "text", "required": True},
+                {"name": "content", "description": "メイン内容", "type": "textarea", "required": True}
+            ],
+            "example_input": "明日の会議について連絡したい",
+            "example_output": "件名: 会議について\\n\\n田中様\\n\\nいつもお世話になっております...",
+            "created_at": now,
+            "updated_at": now,
+            "is_active": True
+        },
+        {
+            "id": "2",
+            "name": "🔍 コードレビュー",
+            "description": "コードを分析して改善点を提案",
+            "category": "開発",
+            "system_prompt": "{language}言語のコードをレビューし、{focus}の観点から改善点を提案してください。",
+            "variables": [
+                {"name": "language", "description": "プログラミング言語", "type": "text", "required": True},
+                {"name": "focus", "description": "レビュー観点", "type": "select", "options": ["セキュリティ", "パフォーマンス", "可読性", "全般"], "required": True}
+            ],
+            "example_input": "このPython関数をレビューしてください",
+            "example_output": "コードレビュー結果:\\n\\n良い点:\\n- 関数名が明確...",
+            "created_at": now,
+            "updated_at": now,
+            "is_active": True
+        }
+    ]
+    
+    for template in demo_templates:
+        store_template(template)
+    
+    print(f"📝 デモテンプレート初期化: {len(demo_templates)}件")
+
+class MinimalAPIHandler(BaseHTTPRequestHandler):
+    """Fallback stdlib handler used when aiohttp is not installed"""
+
+    # Keep connections alive between requests (every response sets Content-Length)
+    protocol_version = 'HTTP/1.1'
+
+    def do_OPTIONS(self):
+        """CORS preflight"""
+        self.send_response(200)
+        for name, value in CORS_PREFLIGHT_HEADERS.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        """GET requests"""
+        parsed_path = urlparse(self.path)
         
-        for template in demo_templates:
-            templates_storage[template["id"]] = template
+        if parsed_path.path == '/health':
+            self.send_bytes_response(get_health_json())
+        elif parsed_path.path in ['/api/templates', '/api/v1/templates']:
+            self.send_bytes_response(get_templates_json())
+        elif parsed_path.path in ['/api/models', '/api/v1/models']:
+            # Return available models
+            self.send_bytes_response(MODELS_JSON_BYTES)
+        else:
+            self.send_error(404, "Not Found")
+
+    def do_POST(self):
+        """POST requests"""
+        parsed_path = urlparse(self.path)
         
-        print(f"📝 デモテンプレート初期化: {len(demo_templates)}件")
+        if parsed_path.path in ['/api/chat', '/api/v1/ai/chat']:
+            # Chat endpoint - return demo response
+            request_data = self.read_json_body()
+            if request_data is not None:
+                self.send_json_response(build_chat_response(request_data))
+        elif parsed_path.path in ['/api/templates', '/api/v1/templates']:
+            # Template creation endpoint
+            self.handle_create_template()
+        else:
+            self.discard_request_body()
+            self.send_error(404, "Not Found")
 
     def handle_create_template(self):
         """Handle template creation"""
+        request_data = self.read_json_body()
+        if request_data is None:
+            return
+        
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            request_data = json.loads(post_data.decode('utf-8'))
-            
-            # Generate new template ID
-            template_id = str(uuid.uuid4())
-            now = datetime.now().isoformat()
-            
-            # Create new template
-            template = {
-                "id": template_id,
-                "name": request_data.get('name', ''),
-                "description": request_data.get('description', ''),
-                "category": request_data.get('category', ''),
-                "system_prompt": request_data.get('system_prompt', ''),
-                "variables": request_data.get('variables', []),
-                "example_input": request_data.get('example_input', ''),
-                "example_output": request_data.get('example_output', ''),
-                "created_at": now,
-                "updated_at": now,
-                "is_active": True
-            }
-            
-            # Store template
-            templates_storage[template_id] = template
-            
-            print(f"✅ テンプレート作成: {template['name']} (ID: {template_id})")
-            
             # Return created template
-            self.send_json_response({
-                "message": "Template created successfully",
-                "id": template_id,
-                "template": template
-            })
+            self.send_json_response(create_template(request_data))
             
-        except json.JSONDecodeError:
-            self.send_error(400, "Invalid JSON")
         except Exception as e:
             print(f"❌ テンプレート作成エラー: {e}")
             self.send_error(500, f"Template creation error: {str(e)}")
 
+    def read_json_body(self):
+        """Read the request body as a JSON object (sends 400 and returns None if invalid)"""
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            # The body length is unknown, so the connection cannot be reused
+            self.close_connection = True
+            self.send_error(400, "Invalid Content-Length")
+            return None
+        
+        try:
+            return decode_json_object(self.rfile.read(content_length) if content_length > 0 else b'')
+        except ValueError:
+            self.send_error(400, "Invalid JSON")
+            return None
+
+    def discard_request_body(self):
+        """Read and drop an unused request body so it is not parsed as the next request"""
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            self.close_connection = True
+            return
+        if content_length > 0:
+            self.rfile.read(content_length)
+
     def send_json_response(self, data):
         """Send JSON response"""
-        response = json.dumps(data, ensure_ascii=False, indent=2)
+        self.send_bytes_response(encode_json(data))
+
+    def send_bytes_response(self, payload):
+        """Send pre-encoded JSON bytes"""
         self.send_response(200)
         self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        self.wfile.write(response.encode('utf-8'))
+        self.wfile.write(payload)
 
     def log_message(self, format, *args):
         """Control log messages"""
         print(f"[{datetime.now().strftime('%H:%M:%S')}] {format % args}")
 
-def start_minimal_server():
-    """Start the minimal API server"""
-    server_address = ('localhost', 8000)
-    httpd = HTTPServer(server_address, MinimalAPIHandler)
+def json_response(data):
+    """aiohttp JSON response (same encoding as the stdlib server)"""
+    return bytes_response(encode_json(data))
+
+def bytes_response(payload):
+    """aiohttp response for pre-encoded JSON bytes"""
+    return web.Response(body=payload, content_type='application/json', charset='utf-8')
+
+async def read_json(request):
+    """Parse the request body as a JSON object (400 on invalid JSON)"""
+    try:
+        return decode_json_object(await request.read())
+    except ValueError:
+        raise web.HTTPBadRequest(text="Invalid JSON")
+
+def create_app():
+    """Build the aiohttp application"""
+
+    @web.middleware
+    async def cors_middleware(request, handler):
+        if request.method == 'OPTIONS':
+            return web.Response(headers=CORS_PREFLIGHT_HEADERS)
+        try:
+            response = await handler(request)
+        except web.HTTPException as exc:
+            exc.headers.update(CORS_ALLOW_ORIGIN)
+            raise
+        response.headers.update(CORS_ALLOW_ORIGIN)
+        return response
+
+    async def health(request):
+        return bytes_response(get_health_json())
+
+    async def list_templates(request):
+        return bytes_response(get_templates_json())
+
+    async def list_models(request):
+        return bytes_response(MODELS_JSON_BYTES)
+
+    async def chat(request):
+        return json_response(build_chat_response(await read_json(request)))
+
+    async def create_template_handler(request):
+        request_data = await read_json(request)
+        try:
+            return json_response(create_template(request_data))
+        except Exception as e:
+            print(f"❌ テンプレート作成エラー: {e}")
+            raise web.HTTPInternalServerError(text=f"Template creation error: {str(e)}")
+
+    app = web.Application(middlewares=[cors_middleware])
+    app.add_routes([
+        web.get('/health', health),
+        web.get('/api/templates', list_templates),
+        web.get('/api/v1/templates', list_templates),
+        web.get('/api/models', list_models),
+        web.get('/api/v1/models', list_models),
+        web.post('/api/chat', chat),
+        web.post('/api/v1/ai/chat', chat),
+        web.post('/api/templates', create_template_handler),
+        web.post('/api/v1/templates', create_template_handler),
+    ])
+    return app
+
+def print_banner():
     print("🚀 Minimal API Server starting...")
     print("📍 URL: http://localhost:8000")
     print("🔧 Health Check: http://localhost:8000/health")
@@ -278,6 +500,28 @@ def start_minimal_server():
     print("📝 Templates: http://localhost:8000/api/templates")
     print("⭐ Models: http://localhost:8000/api/models")
     print("=" * 50)
+
+def start_aiohttp_server():
+    """Start the minimal API server on aiohttp.web (uvloop if available)"""
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
+    print_banner()
+    web.run_app(create_app(), host='localhost', port=8000, access_log=None, print=None)
+    print("\n🛑 Stopping server...")
+
+def start_minimal_server():
+    """Start the minimal API server"""
+    if AIOHTTP_AVAILABLE:
+        start_aiohttp_server()
+        return
+    
+    server_address = ('localhost', 8000)
+    httpd = ThreadingHTTPServer(server_address, MinimalAPIHandler)
+    print_banner()
     
     try:
         httpd.serve_forever()
@@ -286,4 +530,4 @@ def start_minimal_server():
         httpd.shutdown()
 
 if __name__ == '__main__':
-    start_minimal_server()
\ No newline at end of file
+    start_minimal_server()
@@ -3,50 +3,154 @@
 セキュアAIチャット - 起動前システムチェック
 """
 
-import asyncio
+import errno
+import functools
+import importlib.util
 import sys
 import os
 from pathlib import Path
-import logging
-import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Any
-import psutil
+import selectors
 import socket
+import time
 
 # パスを追加
 project_root = Path(__file__).parent.parent
 backend_dir = project_root / "backend"
 frontend_dir = project_root / "frontend"
 
+# ポート使用状況チェックの接続待ち上限（秒）
+PORT_CHECK_TIMEOUT = 0.5
+
+# 必須パッケージ: (パッケージ名, モジュール名)（モジュール名はモジュール読み込み時に1回だけ求める）
+_MODULE_NAME_OVERRIDES = {"python-jose": "jose"}  # パッケージ名とモジュール名が異なるもの
+_REQUIRED_PACKAGES: Tuple[Tuple[str, str], ...] = tuple(
+    (package, _MODULE_NAME_OVERRIDES.get(package, package.replace("-", "_")))
+    for package in (
+        "fastapi", "sqlalchemy", "asyncpg", "uvicorn",
+        "alembic", "httpx", "pydantic", "python-jose",
+        "passlib", "cryptography", "redis", "psutil"
+    )
+)
+
+# 環境変数チェックの対象
+_CRITICAL_ENV_VARS: Tuple[str, ...] = ("DATABASE_URL",)
+_RECOMMENDED_ENV_VARS: Tuple[str, ...] = (
+    "SECRET_KEY", "JWT_SECRET_KEY", "ENCRYPTION_KEY",
+    "AZURE_OPENAI_API_KEY", "OPENAI_API_KEY"
+)
+
 sys.path.append(str(backend_dir))
 
-try:
-    from backend.app.core.config import settings
-except ImportError:
-    print("❌ バックエンドモジュールのインポートに失敗しました")
-    sys.exit(1)
+@functools.lru_cache(maxsize=1)
+def _get_settings():
+    """バックエンド設定を初回使用時にだけ読み込む"""
+    try:
+        from backend.app.core.config import settings
+    except ImportError:
+        print("❌ バックエンドモジュールのインポートに失敗しました")
+        sys.exit(1)
+    return settings
+
+@functools.lru_cache(maxsize=None)
+def _env_snapshot(names: Tuple[str, ...]) -> Dict[str, Any]:
+    """環境変数（未設定ならバックエンド設定）の値をまとめて1回だけ取得"""
+    settings = _get_settings()
+    return {var: os.getenv(var) or getattr(settings, var, None) for var in names}
+
+# データベース接続チェックの接続タイムアウト（秒）
+DB_CONNECT_TIMEOUT = 2
+
+@functools.lru_cache(maxsize=1)
+def _db_engine(url: str):
+    """同期エンジンを1つだけ作成して使い回す（停止中のDBでは短いタイムアウトで失敗させる）"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import make_url
+    
+    connect_args = {}
+    if make_url(url).get_backend_name() in ("postgresql", "mysql"):
+        connect_args["connect_timeout"] = DB_CONNECT_TIMEOUT
+    return create_engine(url, pool_pre_ping=False, connect_args=connect_args)
+
+# システムリソース（メモリ・ディスク空き容量）の測定値を再利用する時間（秒）
+RESOURCE_CACHE_SECONDS = 30
+
+@functools.lru_cache(maxsize=1)
+def _resources(bucket: int) -> Tuple[int, int]:
+    """使用可能メモリとディスク空き容量（バイト）を取得（同じ時間区分内では前回の値を再利用）"""
+    import psutil
+    return psutil.virtual_memory().available, psutil.disk_usage(str(project_root)).free
+
+@functools.lru_cache(maxsize=1)
+def _redis_client(url: str):
+    """Redisクライアントを1つだけ作成して使い回す（停止中のRedisでは短いタイムアウトで失敗させる）"""
+    import redis
+    return redis.from_url(url, socket_connect_timeout=1.0, socket_timeout=1.0)
 
 class SystemChecker:
     """システムチェッククラス"""
     
+    # 前提となるチェック（先にメインスレッドで実行）
+    _PREREQUISITE_CHECKS: Tuple[str, ...] = (
+        "check_python_version",
+        "check_required_packages",
+    )
+    # 互いに独立したI/O待ちのチェック（DB・Redis・ポート等、並列に実行）
+    _PARALLEL_CHECKS: Tuple[str, ...] = (
+        "check_environment_variables",
+        "check_database_connection",
+        "check_redis_connection",
+        "check_file_permissions",
+        "check_port_availability",
+        "check_system_resources",
+        "check_security_configuration",
+    )
+    # 環境変数が同じなら結果が変わらないチェック（同一プロセス内の再実行では前回の結果を再利用）
+    # DB・Redis接続は現在の到達可否を見るため対象外（エンジン・クライアント自体は使い回している）
+    _CACHEABLE_CHECKS = frozenset({
+        "check_python_version",
+        "check_required_packages",
+        "check_environment_variables",
+        "check_security_configuration",
+    })
+    # (チェック名, 環境変数のハッシュ) -> 追加されたチェック結果
+    _result_cache: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+    # _env_snapshot のキャッシュを作成した時点の環境変数のハッシュ
+    _snapshot_env_key = None
+    
     def __init__(self):
         self.checks = []
         self.warnings = []
         self.errors = []
+        # 並列実行中のチェックはスレッドごとに結果を溜め、完了後に定義順で記録する
+        self._local = threading.local()
     
     def add_check(self, name: str, status: bool, message: str, severity: str = "info"):
         """チェック結果を追加"""
-        self.checks.append({
+        check = {
             "name": name,
             "status": status,
             "message": message,
             "severity": severity
-        })
+        }
+        
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            pending.append(check)
+        else:
+            self._record_check(check)
+    
+    def _record_check(self, check: Dict[str, Any]):
+        """チェック結果を記録"""
+        self.checks.append(check)
         
-        if severity == "error" and not status:
-            self.errors.append(f"{name}: {message}")
-        elif severity == "warning" and not status:
-            self.warnings.append(f"{name}: {message}")
+        if not check["status"]:
+            if check["severity"] == "error":
+                self.errors.append(f"{check['name']}: {check['message']}")
+            elif check["severity"] == "warning":
+                self.warnings.append(f"{check['name']}: {check['message']}")
     
     def check_python_version(self) -> bool:
         """Pythonバージョンチェック"""
@@ -71,25 +175,18 @@ class SystemChecker:
     
     def check_required_packages(self) -> bool:
         """必須パッケージチェック"""
-        required_packages = [
-            "fastapi", "sqlalchemy", "asyncpg", "uvicorn",
-            "alembic", "httpx", "pydantic", "python-jose",
-            "passlib", "cryptography", "redis", "psutil"
-        ]
-        
         missing_packages = []
         
-        for package in required_packages:
-            try:
-                __import__(package.replace("-", "_"))
-            except ImportError:
+        for package, module_name in _REQUIRED_PACKAGES:
+            # モジュールを実際にインポートせず、存在だけを確認
+            if importlib.util.find_spec(module_name) is None:
                 missing_packages.append(package)
         
         if not missing_packages:
             self.add_check(
                 "必須パッケージ",
                 True,
-                f"全ての必須パッケージが利用可能 ({len(required_packages)}個)"
+                f"全ての必須パッケージが利用可能 ({len(_REQUIRED_PACKAGES)}個)"
             )
             return True
         else:
@@ -103,24 +200,9 @@ class SystemChecker:
     
     def check_environment_variables(self) -> bool:
         """環境変数チェック"""
-        critical_vars = ["DATABASE_URL"]
-        recommended_vars = [
-            "SECRET_KEY", "JWT_SECRET_KEY", "ENCRYPTION_KEY",
-            "AZURE_OPENAI_API_KEY", "OPENAI_API_KEY"
-        ]
-        
-        missing_critical = []
-        missing_recommended = []
-        
-        for var in critical_vars:
-            value = os.getenv(var) or getattr(settings, var, None)
-            if not value:
-                missing_critical.append(var)
-        
-        for var in recommended_vars:
-            value = os.getenv(var) or getattr(settings, var, None)
-            if not value:
-                missing_recommended.append(var)
+        env = _env_snapshot(_CRITICAL_ENV_VARS + _RECOMMENDED_ENV_VARS)
+        missing_critical = [var for var in _CRITICAL_ENV_VARS if not env[var]]
+        missing_recommended = [var for var in _RECOMMENDED_ENV_VARS if not env[var]]
         
         if not missing_critical:
             self.add_check(
@@ -156,14 +238,11 @@ class SystemChecker:
     def check_database_connection(self) -> bool:
         """データベース接続チェック"""
         try:
-            from sqlalchemy import create_engine
-            from sqlalchemy.ext.asyncio import create_async_engine
+            from sqlalchemy import text
             
-            # 同期エンジンでのテスト
-            engine = create_engine(settings.DATABASE_URL)
-            with engine.connect() as conn:
-                conn.execute("SELECT 1")
-            engine.dispose()
+            # 同期エンジンでのテスト（エンジンは使い回すためdisposeしない）
+            with _db_engine(_get_settings().DATABASE_URL).connect() as conn:
+                conn.execute(text("SELECT 1"))
             
             self.add_check(
                 "データベース接続",
@@ -184,13 +263,8 @@ class SystemChecker:
     def check_redis_connection(self) -> bool:
         """Redis接続チェック"""
         try:
-            import redis
-            
-            # Redis URLを解析
-            redis_url = getattr(settings, 'REDIS_URL', 'redis://localhost:6379/0')
-            r = redis.from_url(redis_url)
-            r.ping()
-            r.close()
+            redis_url = getattr(_get_settings(), 'REDIS_URL', 'redis://localhost:6379/0')
+            _redis_client(redis_url).ping()
             
             self.add_check(
                 "Redis接続",
@@ -214,24 +288,32 @@ class SystemChecker:
             backend_dir,
             backend_dir / "app",
             backend_dir / "alembic",
-            frontend_dir if frontend_dir.exists() else None
+            frontend_dir
         ]
         
         issues = []
         
         for path in critical_paths:
-            if path and path.exists():
-                try:
-                    # 読み取り権限チェック
-                    if not os.access(path, os.R_OK):
-                        issues.append(f"{path}: 読み取り権限なし")
-                    
-                    # 書き込み権限チェック (ログディレクトリなど)
-                    if path == backend_dir and not os.access(path, os.W_OK):
-                        issues.append(f"{path}: 書き込み権限なし")
+            try:
+                # 存在確認はstat 1回で行い、存在しないパスは対象外
+                os.stat(path)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                issues.append(f"{path}: 権限チェックエラー - {e}")
+                continue
+            
+            try:
+                # 読み取り権限チェック（ACL等も考慮されるようos.accessで判定）
+                if not os.access(path, os.R_OK):
+                    issues.append(f"{path}: 読み取り権限なし")
                 
-                except Exception as e:
-                    issues.append(f"{path}: 権限チェックエラー - {e}")
+                # 書き込み権限チェック (ログディレクトリなど)
+                if path == backend_dir and not os.access(path, os.W_OK):
+                    issues.append(f"{path}: 書き込み権限なし")
+            
+            except Exception as e:
+                issues.append(f"{path}: 権限チェックエラー - {e}")
         
         if not issues:
             self.add_check(
@@ -256,19 +338,46 @@ class SystemChecker:
             (3000, "フロントエンド"),
         ]
         
-        unavailable_ports = []
+        ports_in_use = set()
         
-        for port, description in ports_to_check:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            try:
-                result = sock.connect_ex(('localhost', port))
+        # 全ポートへ非ブロッキングで同時に接続し、待ち時間を最も遅いポート分（最大PORT_CHECK_TIMEOUT秒）に抑える
+        selector = selectors.DefaultSelector()
+        sockets = []
+        try:
+            for port, description in ports_to_check:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sockets.append(sock)
+                sock.setblocking(False)
+                try:
+                    result = sock.connect_ex(('localhost', port))
+                except OSError:
+                    continue
                 if result == 0:
-                    unavailable_ports.append(f"ポート{port} ({description})")
-            except Exception:
-                pass
-            finally:
+                    ports_in_use.add(port)
+                elif result in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+                    selector.register(sock, selectors.EVENT_WRITE, port)
+            
+            deadline = time.monotonic() + PORT_CHECK_TIMEOUT
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break  # 応答のないポートは使用されていないとみなす
+                for key, _ in selector.select(timeout=remaining):
+                    selector.unregister(key.fileobj)
+                    # 接続成功なら使用中、拒否されれば空き
+                    if key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                        ports_in_use.add(key.data)
+        finally:
+            selector.close()
+            for sock in sockets:
                 sock.close()
         
+        unavailable_ports = [
+            f"ポート{port} ({description})"
+            for port, description in ports_to_check
+            if port in ports_in_use
+        ]
+        
         if not unavailable_ports:
             self.add_check(
                 "ポート使用可能性",
@@ -287,9 +396,10 @@ class SystemChecker:
     
     def check_system_resources(self) -> bool:
         """システムリソースチェック"""
+        available_bytes, free_bytes = _resources(int(time.monotonic()) // RESOURCE_CACHE_SECONDS)
+        
         # メモリチェック
-        memory = psutil.virtual_memory()
-        available_gb = memory.available / (1024**3)
+        available_gb = available_bytes / (1024**3)
         
         if available_gb < 1.0:
             self.add_check(
@@ -306,8 +416,7 @@ class SystemChecker:
             )
         
         # ディスク容量チェック
-        disk = psutil.disk_usage(str(project_root))
-        free_gb = disk.free / (1024**3)
+        free_gb = free_bytes / (1024**3)
         
         if free_gb < 1.0:
             self.add_check(
@@ -327,17 +436,21 @@ class SystemChecker:
     
     def check_security_configuration(self) -> bool:
         """セキュリティ設定チェック"""
+        settings = _get_settings()
+        # 設定値は1回だけ読み出して使い回す
+        is_production = settings.is_production
         issues = []
         
         # プロダクション環境での設定チェック
-        if settings.is_production:
+        if is_production:
+            secret_key = settings.SECRET_KEY
             if not settings.SSL_CERT_PATH or not settings.SSL_KEY_PATH:
                 issues.append("SSL証明書が設定されていません")
             
             if settings.DEBUG:
                 issues.append("本番環境でDEBUGモードが有効です")
             
-            if not settings.SECRET_KEY or settings.SECRET_KEY == "your-super-secret-key-change-this-in-production":
+            if not secret_key or secret_key == "your-super-secret-key-change-this-in-production":
                 issues.append("デフォルトのSECRET_KEYが使用されています")
         
         # AI API設定チェック
@@ -352,7 +465,7 @@ class SystemChecker:
             )
             return True
         else:
-            severity = "error" if settings.is_production else "warning"
+            severity = "error" if is_production else "warning"
             self.add_check(
                 "セキュリティ設定",
                 False,
@@ -361,34 +474,63 @@ class SystemChecker:
             )
             return False
     
+    def _run_check(self, check_func):
+        """チェックを1つ実行（例外はエラーとして記録）"""
+        try:
+            check_func()
+        except Exception as e:
+            self.add_check(
+                check_func.__name__.replace('check_', '').replace('_', ' ').title(),
+                False,
+                f"チェック中にエラーが発生: {str(e)}",
+                "error"
+            )
+    
+    def _run_check_buffered(self, check_func) -> List[Dict[str, Any]]:
+        """ワーカースレッドでチェックを実行し、追加された結果を返す"""
+        self._local.pending = []
+        try:
+            self._run_check(check_func)
+            return self._local.pending
+        finally:
+            self._local.pending = None
+    
+    def _run_check_cached(self, check_func, env_key: int) -> List[Dict[str, Any]]:
+        """チェックを実行して結果を返す（キャッシュ対象なら同じ環境での前回の結果を再利用）"""
+        name = check_func.__name__
+        if name not in self._CACHEABLE_CHECKS:
+            return self._run_check_buffered(check_func)
+        
+        cache_key = (name, env_key)
+        cached = self._result_cache.get(cache_key)
+        if cached is None:
+            cached = self._run_check_buffered(check_func)
+            self._result_cache[cache_key] = cached
+        return [dict(check) for check in cached]
+    
     def run_all_checks(self) -> Dict[str, Any]:
         """全チェック実行"""
         print("🔍 システムチェックを実行中...\n")
         
-        checks_to_run = [
-            self.check_python_version,
-            self.check_required_packages,
-            self.check_environment_variables,
-            self.check_database_connection,
-            self.check_redis_connection,
-            self.check_file_permissions,
-            self.check_port_availability,
-            self.check_system_resources,
-            self.check_security_configuration,
-        ]
+        # 環境変数が変わればキャッシュ済みの結果は使わない
+        env_key = hash(frozenset(os.environ.items()))
+        if env_key != SystemChecker._snapshot_env_key:
+            _env_snapshot.cache_clear()
+            SystemChecker._snapshot_env_key = env_key
         
-        results = []
+        for name in self._PREREQUISITE_CHECKS:
+            for check in self._run_check_cached(getattr(self, name), env_key):
+                self._record_check(check)
         
-        for check_func in checks_to_run:
-            try:
-                check_func()
-            except Exception as e:
-                self.add_check(
-                    check_func.__name__.replace('check_', '').replace('_', ' ').title(),
-                    False,
-                    f"チェック中にエラーが発生: {str(e)}",
-                    "error"
-                )
+        with ThreadPoolExecutor(max_workers=len(self._PARALLEL_CHECKS)) as executor:
+            futures = [
+                executor.submit(self._run_check_cached, getattr(self, name), env_key)
+                for name in self._PARALLEL_CHECKS
+            ]
+            # 完了順ではなく定義順に記録して出力順を一定に保つ
+            for future in futures:
+                for check in future.result():
+                    self._record_check(check)
         
         return {
             "checks": self.checks,
@@ -397,10 +539,12 @@ class SystemChecker:
         }
     
     def print_results(self):
-        """結果を出力"""
-        print("=" * 60)
-        print("📊 システムチェック結果")
-        print("=" * 60)
+        """結果を出力（まとめて1回で書き出す）"""
+        lines = []
+        
+        lines.append("=" * 60)
+        lines.append("📊 システムチェック結果")
+        lines.append("=" * 60)
         
         for check in self.checks:
             status_icon = "✅" if check["status"] else "❌"
@@ -408,37 +552,41 @@ class SystemChecker:
             if check["severity"] == "warning":
                 status_icon = "⚠️"
             
-            print(f"{status_icon} {check['name']}: {check['message']}")
+            lines.append(f"{status_icon} {check['name']}: {check['message']}")
         
-        print(f"\n総チェック数: {len(self.checks)}")
-        print(f"成功: {sum(1 for c in self.checks if c['status'])}")
-        print(f"警告: {len(self.warnings)}")
-        print(f"エラー: {len(self.errors)}")
+        lines.append(f"\n総チェック数: {len(self.checks)}")
+        lines.append(f"成功: {sum(1 for c in self.checks if c['status'])}")
+        lines.append(f"警告: {len(self.warnings)}")
+        lines.append(f"エラー: {len(self.errors)}")
         
         if self.errors:
-            print(f"\n❌ 以下のエラーを修正してください:")
+            lines.append(f"\n❌ 以下のエラーを修正してください:")
             for error in self.errors:
-                print(f"   • {error}")
+                lines.append(f"   • {error}")
         
         if self.warnings:
-            print(f"\n⚠️  以下の警告を確認してください:")
+            lines.append(f"\n⚠️  以下の警告を確認してください:")
             for warning in self.warnings:
-                print(f"   • {warning}")
+                lines.append(f"   • {warning}")
         
         if not self.errors and not self.warnings:
-            print(f"\n🎉 全てのチェックが成功しました！")
-            print(f"   システムは起動準備完了です。")
+            lines.append(f"\n🎉 全てのチェックが成功しました！")
+            lines.append(f"   システムは起動準備完了です。")
         elif not self.errors:
-            print(f"\n✅ 重要なエラーはありませんが、警告を確認してください。")
+            lines.append(f"\n✅ 重要なエラーはありませんが、警告を確認してください。")
         else:
-            print(f"\n❌ エラーが検出されました。修正後に再度チェックを実行してください。")
+            lines.append(f"\n❌ エラーが検出されました。修正後に再度チェックを実行してください。")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
 
 def main():
     """メイン処理"""
-    print("🚀 セキュアAIチャット - システム起動チェック")
-    print(f"プロジェクトルート: {project_root}")
-    print(f"環境: {getattr(settings, 'ENVIRONMENT', 'unknown')}")
-    print()
+    environment = getattr(_get_settings(), 'ENVIRONMENT', 'unknown')
+    sys.stdout.write(
+        "🚀 セキュアAIチャット - システム起動チェック\n"
+        f"プロジェクトルート: {project_root}\n"
+        f"環境: {environment}\n\n"
+    )
     
     checker = SystemChecker()
     results = checker.run_all_checks()
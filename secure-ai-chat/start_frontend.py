@@ -3,10 +3,13 @@
 フロントエンド用シンプルHTTPサーバー
 """
 
+import hashlib
 import http.server
-import socketserver
 import os
 import sys
+import threading
+import urllib.parse
+from collections import OrderedDict
 from pathlib import Path
 
 # フロントエンドディレクトリに移動
@@ -15,16 +18,94 @@ os.chdir(frontend_dir)
 
 PORT = 3000
 
+# 静的ファイルのメモリキャッシュ設定
+FILE_CACHE_MAX_ENTRIES = 256
+FILE_CACHE_MAX_FILE_BYTES = 1 << 20  # これより大きいファイルはキャッシュせず通常通り配信
+CACHE_CONTROL = "no-cache"  # 開発中の変更をすぐ反映するため毎回ETagで再検証させる
+
 class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # ブラウザがHTML・CSS・JSを同じ接続で取得できるようkeep-aliveを有効化
+    protocol_version = "HTTP/1.1"
+
+    _CORS_HEADERS = (
+        b"Access-Control-Allow-Origin: *\r\n"
+        b"Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+        b"Access-Control-Allow-Headers: Content-Type\r\n"
+    )
+
+    # ファイルパス -> (mtime_ns, size, 本文, ETag, Content-Type)（更新されたファイルはmtimeとサイズで検知）
+    _file_cache = OrderedDict()
+    _file_cache_lock = threading.Lock()
+
+    def do_GET(self):
+        """静的ファイルをメモリキャッシュから配信（ETagが一致すれば304）"""
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            # ディレクトリはindex.htmlがあればそれを配信（リダイレクトや一覧表示は標準の処理に任せる）
+            if not urllib.parse.urlsplit(self.path).path.endswith('/'):
+                return super().do_GET()
+            path = os.path.join(path, 'index.html')
+        
+        entry = self.get_cached_file(path)
+        if entry is None:
+            return super().do_GET()
+        _, _, body, etag, content_type = entry
+        
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', CACHE_CONTROL)
+            self.end_headers()
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', CACHE_CONTROL)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def get_cached_file(self, path):
+        """キャッシュ済みのファイルを返す（未キャッシュ・更新済みなら読み込む。対象外ならNone）"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path) or stat.st_size > FILE_CACHE_MAX_FILE_BYTES:
+            return None
+        
+        with self._file_cache_lock:
+            entry = self._file_cache.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._file_cache.move_to_end(path)
+                return entry
+        
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            return None
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        entry = (stat.st_mtime_ns, stat.st_size, body, etag, self.guess_type(path))
+        
+        with self._file_cache_lock:
+            self._file_cache[path] = entry
+            self._file_cache.move_to_end(path)
+            while len(self._file_cache) > FILE_CACHE_MAX_ENTRIES:
+                self._file_cache.popitem(last=False)
+        return entry
+
     def end_headers(self):
-        # CORSヘッダーを追加
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        # CORSヘッダーを追加（エンコード済みのバイト列をヘッダーバッファに積み、ステータス行と一緒に1回で送信）
+        if self.request_version != 'HTTP/0.9':
+            self._headers_buffer.append(self._CORS_HEADERS)
         super().end_headers()
 
 try:
-    with socketserver.TCPServer(("", PORT), CustomHTTPRequestHandler) as httpd:
+    # 静的ファイルへの並列リクエストをスレッドで同時に処理（daemon_threadsは既定で有効）
+    with http.server.ThreadingHTTPServer(("", PORT), CustomHTTPRequestHandler) as httpd:
         print(f"🌐 フロントエンドサーバー起動中...")
         print(f"📁 提供ディレクトリ: {frontend_dir}")
         print(f"🔗 アクセスURL:")
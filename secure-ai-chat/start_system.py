@@ -5,41 +5,48 @@
 
 import subprocess
 import time
-import threading
 import signal
+import socket
 import sys
 from pathlib import Path
 
-def run_backend():
-    """バックエンドAPIサーバーを起動"""
-    backend_dir = Path(__file__).parent / "backend"
-    cmd = ["python3", "simple_api.py"]
-    
-    try:
-        process = subprocess.run(
-            cmd, 
-            cwd=backend_dir, 
-            capture_output=False
-        )
-    except KeyboardInterrupt:
-        pass
+# 起動した子プロセス（停止時にまとめて終了させる）
+processes = []
 
-def run_frontend():
-    """フロントエンドサーバーを起動"""
-    cmd = ["python3", "start_frontend.py"]
-    
-    try:
-        process = subprocess.run(
-            cmd, 
-            cwd=Path(__file__).parent,
-            capture_output=False
-        )
-    except KeyboardInterrupt:
-        pass
+def launch(cmd, cwd):
+    """子プロセスとしてサーバーを起動"""
+    process = subprocess.Popen(cmd, cwd=cwd)
+    processes.append(process)
+    return process
+
+def wait_port(port, process=None, timeout=10.0):
+    """ポートが接続を受け付けるまで待機（子プロセスが終了した場合やタイムアウト時はFalse）"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            if sock.connect_ex(('localhost', port)) == 0:
+                return True
+        if process is not None and process.poll() is not None:
+            return False
+        time.sleep(0.05)
+    return False
+
+def stop_processes():
+    """起動した子プロセスにSIGINTを送り、終了を待つ（応答がなければ強制終了）"""
+    for process in processes:
+        if process.poll() is None:
+            process.send_signal(signal.SIGINT)
+    for process in processes:
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
 
 def signal_handler(sig, frame):
     """Ctrl+C ハンドラー"""
     print('\n\n🛑 システムを停止しています...')
+    stop_processes()
     sys.exit(0)
 
 def main():
@@ -49,32 +56,37 @@ def main():
     # シグナルハンドラーを設定
     signal.signal(signal.SIGINT, signal_handler)
     
-    # バックエンドとフロントエンドを並行実行
-    backend_thread = threading.Thread(target=run_backend, daemon=True)
-    frontend_thread = threading.Thread(target=run_frontend, daemon=True)
+    # バックエンドとフロントエンドを子プロセスとして並行実行
+    base_dir = Path(__file__).parent
     
+    # 固定時間待つのではなく、各ポートが接続を受け付けた時点で次へ進む
     print("🔧 バックエンドAPI起動中... (Port 8000)")
-    backend_thread.start()
-    time.sleep(2)
+    backend = launch(["python3", "simple_api.py"], base_dir / "backend")
+    if not wait_port(8000, backend):
+        print("⚠️  バックエンドAPIの起動を確認できませんでした")
     
     print("🌐 フロントエンド起動中... (Port 3000)")
-    frontend_thread.start()
-    time.sleep(2)
+    frontend = launch(["python3", "start_frontend.py"], base_dir)
+    if not wait_port(3000, frontend):
+        print("⚠️  フロントエンドの起動を確認できませんでした")
     
-    print("\n✅ システム起動完了！")
-    print("=" * 40)
-    print("🌐 アクセスURL:")
-    print("   🏠 ホーム:       http://localhost:3000/")
-    print("   💬 チャット:     http://localhost:3000/chat.html")
-    print("   📝 テンプレート:  http://localhost:3000/templates.html")
-    print("   🔧 API:         http://localhost:8000/")
-    print("\n⚠️  停止するには Ctrl+C を押してください")
+    sys.stdout.write("\n".join([
+        "\n✅ システム起動完了！",
+        "=" * 40,
+        "🌐 アクセスURL:",
+        "   🏠 ホーム:       http://localhost:3000/",
+        "   💬 チャット:     http://localhost:3000/chat.html",
+        "   📝 テンプレート:  http://localhost:3000/templates.html",
+        "   🔧 API:         http://localhost:8000/",
+        "\n⚠️  停止するには Ctrl+C を押してください",
+    ]) + "\n")
     
     try:
-        # メインスレッドを維持
-        while True:
-            time.sleep(1)
+        # 両方の子プロセスが終了するまで待機
+        for process in processes:
+            process.wait()
     except KeyboardInterrupt:
+        stop_processes()
         print("\n🛑 システムを停止しました")
         sys.exit(0)
 
@@ -3,22 +3,33 @@
 プロンプトテンプレート機能テストスクリプト
 """
 
-import requests
+import asyncio
+import httpx
 import json
 from datetime import datetime
 
 API_BASE = "http://localhost:8000"
 
-def test_template_api():
+# 全リクエストで1つのクライアントを共有し、keep-aliveで接続を再利用
+CLIENT_LIMITS = httpx.Limits(max_connections=4, max_keepalive_connections=4)
+CLIENT_TIMEOUT = 10.0
+
+async def run_template_api_checks(client: httpx.AsyncClient):
     """テンプレートAPI機能をテストする"""
     
     print("🧪 プロンプトテンプレートAPI機能テスト")
     print("=" * 50)
     
     try:
+        # 1・2は互いに独立しているため同時に取得
+        templates_response, categories_response = await asyncio.gather(
+            client.get("/api/v1/templates"),
+            client.get("/api/v1/templates/categories")
+        )
+        
         # 1. テンプレート一覧取得テスト
         print("\n1️⃣ テンプレート一覧取得テスト")
-        response = requests.get(f"{API_BASE}/api/v1/templates")
+        response = templates_response
         if response.status_code == 200:
             templates = response.json()
             print(f"✅ {len(templates)}個のテンプレートを取得")
@@ -29,7 +40,7 @@ def test_template_api():
             
         # 2. カテゴリ一覧取得テスト
         print("\n2️⃣ カテゴリ一覧取得テスト")
-        response = requests.get(f"{API_BASE}/api/v1/templates/categories")
+        response = categories_response
         if response.status_code == 200:
             categories = response.json()
             print(f"✅ {len(categories)}個のカテゴリ: {', '.join(categories)}")
@@ -55,9 +66,8 @@ def test_template_api():
             "example_output": "AI（人工知能）は、コンピューターが人間の知的活動を模倣する技術です..."
         }
         
-        response = requests.post(
-            f"{API_BASE}/api/v1/templates",
-            headers={"Content-Type": "application/json"},
+        response = await client.post(
+            "/api/v1/templates",
             json=new_template
         )
         
@@ -76,9 +86,8 @@ def test_template_api():
                 "user_message": "機械学習について詳しく教えてください"
             }
             
-            response = requests.post(
-                f"{API_BASE}/api/v1/templates/{template_id}/use",
-                headers={"Content-Type": "application/json"},
+            response = await client.post(
+                f"/api/v1/templates/{template_id}/use",
                 json=use_request
             )
             
@@ -96,7 +105,7 @@ def test_template_api():
                 
             # 5. テンプレート削除テスト
             print("\n5️⃣ テンプレート削除テスト")
-            response = requests.delete(f"{API_BASE}/api/v1/templates/{template_id}")
+            response = await client.delete(f"/api/v1/templates/{template_id}")
             if response.status_code == 200:
                 print("✅ テンプレート削除成功")
             else:
@@ -106,7 +115,7 @@ def test_template_api():
             print(f"❌ テンプレート作成失敗: {response.status_code}")
             print(response.json())
             
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("❌ API サーバーに接続できません")
         print("   python simple_api.py でサーバーを起動してください")
     except Exception as e:
@@ -115,7 +124,7 @@ def test_template_api():
     print("\n" + "=" * 50)
     print("🏁 テスト完了")
 
-def test_chat_api():
+async def run_chat_api_checks(client: httpx.AsyncClient):
     """チャットAPI機能をテストする"""
     
     print("\n💬 チャットAPI機能テスト")
@@ -132,9 +141,8 @@ def test_chat_api():
             "max_tokens": 100
         }
         
-        response = requests.post(
-            f"{API_BASE}/api/v1/ai/chat",
-            headers={"Content-Type": "application/json"},
+        response = await client.post(
+            "/api/v1/ai/chat",
             json=chat_request
         )
         
@@ -148,16 +156,21 @@ def test_chat_api():
     except Exception as e:
         print(f"❌ チャット機能エラー: {e}")
 
+async def main():
+    """テストを順に実行（全テストで1つのクライアントを共有）"""
+    async with httpx.AsyncClient(base_url=API_BASE, timeout=CLIENT_TIMEOUT, limits=CLIENT_LIMITS) as client:
+        # API サーバー接続テスト
+        try:
+            response = await client.get("/health", timeout=5)
+            if response.status_code == 200:
+                print("🚀 APIサーバー接続確認済み")
+                await run_template_api_checks(client)
+                await run_chat_api_checks(client)
+            else:
+                print("❌ APIサーバー応答エラー")
+        except httpx.HTTPError:
+            print("❌ APIサーバーに接続できません")
+            print("   'python simple_api.py' でサーバーを起動してください")
+
 if __name__ == "__main__":
-    # API サーバー接続テスト
-    try:
-        response = requests.get(f"{API_BASE}/health", timeout=5)
-        if response.status_code == 200:
-            print("🚀 APIサーバー接続確認済み")
-            test_template_api()
-            test_chat_api()
-        else:
-            print("❌ APIサーバー応答エラー")
-    except:
-        print("❌ APIサーバーに接続できません")
-        print("   'python simple_api.py' でサーバーを起動してください")
\ No newline at end of file
+    asyncio.run(main())